@@ -114,7 +114,9 @@ void runBurnSequence(BurnStep* sequence, int steps, int& burnStep, const char* m
     delay(800);
     delay(cameraDelay);
     Serial.println("[CAMERA] Requesting start...");
-    Serial1.println("start");
+    // start:<duration>:<threshold>:<moisture>, empty fields keep the Pi defaults
+    Serial1.print("start:::");
+    Serial1.println(moistureLevel);
 
     delay(500);
 
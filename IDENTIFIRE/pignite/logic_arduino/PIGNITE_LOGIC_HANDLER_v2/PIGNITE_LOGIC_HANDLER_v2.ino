@@ -175,7 +175,9 @@ void runBurnSequence(BurnStep* sequence, int steps, int& burnStep, const char* m
 
   if (!burnActive) {
     Serial.println("[CAMERA] Requesting start...");
-    Serial1.println("start");
+    // start:<duration>:<threshold>:<moisture>, empty fields keep the Pi defaults
+    Serial1.print("start:::");
+    Serial1.println(moistureLevel);
 
     while (Serial1.available() <= 0) {}  // wait for reply
     bool startReply = Serial1.parseInt();
@@ -0,0 +1,74 @@
+# active_regions.py
+# Tile-based active set so burn detection only re-runs near the fire front
+
+import numpy as np
+import config
+
+
+class ActiveRegionTracker:
+    """Tracks which tiles can change between frames.
+
+    Edge tiles may be smaller when the tile size does not divide the frame.
+    A tile is active if it holds burning pixels (or touches a tile that
+    does), or if its max temperature moved more than epsilon since it was
+    last evaluated. window() returns the bounding slices of the active
+    tiles, or None when a full-frame refresh is due.
+    """
+
+    def __init__(self, shape, tile_size=None, epsilon_c=None, refresh_interval=None):
+        self.tile_size = tile_size or config.ACTIVE_TILE_SIZE
+        self.epsilon_c = epsilon_c if epsilon_c is not None else config.ACTIVE_TILE_EPSILON_C
+        self.refresh_interval = refresh_interval or config.ACTIVE_REFRESH_INTERVAL
+
+        height, width = shape
+        self.height = height
+        self.width = width
+        self.row_starts = np.arange(0, height, self.tile_size)
+        self.col_starts = np.arange(0, width, self.tile_size)
+        self.tiles_y = len(self.row_starts)
+        self.tiles_x = len(self.col_starts)
+
+        self.reference_max = None
+        self.frames_since_refresh = 0
+        self.active_tiles = 0
+        self.full_refreshes = 0
+
+    def _tile_reduce(self, frame):
+        rows = np.maximum.reduceat(frame, self.row_starts, axis=0)
+        return np.maximum.reduceat(rows, self.col_starts, axis=1)
+
+    def window(self, celsius_frame, burn_mask):
+        """(row_slice, col_slice) to re-evaluate, an empty window, or None for a full refresh."""
+        tile_max = self._tile_reduce(celsius_frame)
+
+        if self.reference_max is None or self.frames_since_refresh >= self.refresh_interval:
+            self.reference_max = tile_max
+            self.frames_since_refresh = 0
+            self.active_tiles = self.tiles_y * self.tiles_x
+            self.full_refreshes += 1
+            return None
+        self.frames_since_refresh += 1
+
+        changed = np.abs(tile_max - self.reference_max) > self.epsilon_c
+
+        # Burning tiles plus their 8 neighbours
+        burning = self._tile_reduce(burn_mask) > 0
+        front = burning.copy()
+        front[1:, :] |= burning[:-1, :]
+        front[:-1, :] |= burning[1:, :]
+        front[:, 1:] |= front[:, :-1].copy()
+        front[:, :-1] |= front[:, 1:].copy()
+
+        active = changed | front
+        # Reference only moves where the tile was actually re-evaluated
+        self.reference_max[active] = tile_max[active]
+        self.active_tiles = int(np.count_nonzero(active))
+
+        if not self.active_tiles:
+            return slice(0, 0), slice(0, 0)
+
+        rows = np.flatnonzero(active.any(axis=1))
+        cols = np.flatnonzero(active.any(axis=0))
+        t = self.tile_size
+        return (slice(rows[0] * t, min((rows[-1] + 1) * t, self.height)),
+                slice(cols[0] * t, min((cols[-1] + 1) * t, self.width)))
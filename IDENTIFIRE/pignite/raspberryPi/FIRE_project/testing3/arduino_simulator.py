@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# arduino_simulator.py
+# Pseudo-terminal model of the PIGNITE logic Arduino (PIGNITE_LOGIC_HANDLER_v2)
+#
+#   python3 arduino_simulator.py sequence              # prints a pty path, run main.py --uart-port <path>
+#   python3 arduino_simulator.py bench --bauds 9600 115200
+
+import os
+import sys
+import tty
+import time
+import select
+import threading
+import statistics
+import config
+
+
+# Same burn tables as the Arduino sketch: (time ms, duty cycle)
+BURN_SEQUENCES = [
+    ("DRY", [(10000, 255), (1000, 204), (1000, 255)]),
+    ("MEDIUM", [(2000, 153), (2000, 204), (2000, 255)]),
+    ("WET", [(3000, 153), (3000, 204), (3000, 255)]),
+]
+FIRESTATUS_DELAY_SEC = 10
+
+
+def open_pty():
+    """Create a raw pty pair, return (master_fd, slave_fd, slave_path)."""
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    return master, slave, os.ttyname(slave)
+
+
+class ArduinoSimulator:
+    """Arduino side of the link on a pty master, with a modelled wire time per byte."""
+
+    def __init__(self, baudrate=None, time_scale=1.0):
+        self.baudrate = baudrate or config.UART_BAUDRATE
+        self.time_scale = time_scale
+        self.master, self.slave, self.port = open_pty()
+        self.rx_buffer = b""
+        self.latencies = {}
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _wire_time(self, num_bytes):
+        # 8N1 → 10 bits per byte
+        return num_bytes * 10.0 / self.baudrate
+
+    def send_line(self, text):
+        data = (text + "\n").encode("utf-8")
+        time.sleep(self._wire_time(len(data)))
+        os.write(self.master, data)
+
+    def read_line(self, timeout=None):
+        """Read one line from the Pi, None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self.rx_buffer:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.master], [], [], remaining)
+            if not ready:
+                return None
+            self.rx_buffer += os.read(self.master, 1024)
+
+        line, self.rx_buffer = self.rx_buffer.split(b"\n", 1)
+        time.sleep(self._wire_time(len(line) + 1))
+        return line.decode("utf-8", errors="replace").strip()
+
+    def command(self, text, timeout=5.0):
+        """Send a command, wait for the reply line and record the round trip."""
+        start = time.perf_counter()
+        self.send_line(text)
+        reply = self.read_line(timeout)
+        elapsed = time.perf_counter() - start
+        if reply is not None:
+            self.latencies.setdefault(text, []).append(elapsed)
+        return reply
+
+    def command_int(self, text, timeout=5.0):
+        """Like Serial1.parseInt() on the reply - non-numeric replies read as 0."""
+        reply = self.command(text, timeout)
+        try:
+            return int(reply.split(",")[0])
+        except (AttributeError, ValueError):
+            return 0
+
+    def wait(self, seconds):
+        time.sleep(seconds * self.time_scale)
+
+    def handshake(self, timeout=60):
+        """Wait for the Pi's startup "1", then PING it."""
+        print(f"[Sim] Waiting for Raspberry Pi handshake on {self.port}...")
+        ready = self.read_line(timeout)
+        if ready != "1":
+            print(f"[Sim] ERROR: initial ping failed ({ready!r})")
+            return False
+        if self.command_int("PING") != 1:
+            print("[Sim] ERROR: no response to PING")
+            return False
+        print("[Sim] Handshake successful")
+        return True
+
+    def run_ignition_sequence(self, firestatus_delay=FIRESTATUS_DELAY_SEC, final_timeout=None):
+        """Run the v2 START → burn step → FIRESTATUS → STOP/RESET ladder, then wait for FINAL."""
+        attempts = 0
+        step_time_ms = 0
+
+        for moisture, steps in BURN_SEQUENCES:
+            for step, (time_ms, duty) in enumerate(steps):
+                if self.command_int(f"start:::{moisture}") != 1:
+                    print("[Sim] ERROR: camera failed to start")
+                    return None
+
+                print(f"[Sim] Ignition attempt {step + 1}/{len(steps)} {moisture}: {time_ms} ms @ duty {duty}")
+                self.wait(time_ms / 1000.0)
+                self.wait(firestatus_delay)
+
+                if self.command_int("FIRESTATUS") == 1:
+                    step_time_ms += time_ms
+                    print(f"[Sim] Sample burning ({moisture}) - waiting for FINAL")
+                    return self._wait_final(moisture, step_time_ms, attempts, final_timeout)
+
+                if self.command_int("stop") != 1 or self.command_int("reset") != 1:
+                    print("[Sim] ERROR: camera stop/reset failed")
+                    return None
+                attempts += 1
+                step_time_ms += time_ms
+
+            print(f"[Sim] {moisture}: no ignition after all steps")
+
+        print("[Sim] Sample never ignited after all sequences")
+        return None
+
+    def _wait_final(self, moisture, step_time_ms, attempts, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                print("[Sim] Timed out waiting for FINAL")
+                return None
+            line = self.read_line(remaining)
+            if line is None:
+                continue
+            if not line.startswith("FINAL,"):
+                continue
+
+            values = [float(v) for v in line.split(",")[1:4]]
+            result = {
+                'average_ros': values[0],
+                'peak_ros': values[1],
+                'burned_percentage': values[2],
+                'burn_setting': moisture,
+                'ignition_time_ms': step_time_ms,
+                'ignition_attempts': attempts,
+            }
+            print(f"[Sim] FINAL received: {result}")
+            return result
+
+    def print_latencies(self):
+        for cmd, samples in self.latencies.items():
+            print(f"  {cmd:<12} n={len(samples):<4} "
+                  f"mean={statistics.mean(samples)*1000:7.2f} ms  "
+                  f"p50={statistics.median(samples)*1000:7.2f} ms  "
+                  f"max={max(samples)*1000:7.2f} ms")
+
+
+def _bench_responder(port, baudrate, stop_event, poll_interval):
+    """Pi side for the benchmark: the same poll loop as BurnChamberSystem.run(), with its own sleep."""
+    from uart_controller import UARTController
+
+    uart = UARTController(port=port, baudrate=baudrate)
+    if not uart.connect():
+        return
+
+    callbacks = {
+        'start': lambda duration, threshold, moisture=None: True,
+        'stop': lambda: None,
+        'status': lambda: {'frames_captured': 0},
+        'reset': lambda: None,
+        'fire_status': lambda: False,
+    }
+    uart.send_response("1")
+    while not stop_event.is_set():
+        uart.poll(callbacks)
+        time.sleep(poll_interval)
+    uart.disconnect()
+
+
+def benchmark(bauds, iterations=20, commands=("PING", "STATUS", "FIRESTATUS"), poll_interval=0.0):
+    """Per-command round-trip latency and throughput against the real UARTController loop.
+
+    The responder polls every poll_interval seconds (0 = as fast as it can), so the
+    measured latency is the UART and command handling alone; main.py's loop adds on
+    average half of config.UART_POLL_INTERVAL on top.
+    """
+    print(f"[Bench] Responder poll interval {poll_interval * 1000:.1f} ms "
+          f"(main.py polls every {config.UART_POLL_INTERVAL * 1000:.1f} ms, "
+          f"+{config.UART_POLL_INTERVAL * 500:.1f} ms mean latency)")
+    results = []
+    for baud in bauds:
+        sim = ArduinoSimulator(baudrate=baud)
+        stop_event = threading.Event()
+        responder = threading.Thread(target=_bench_responder, args=(sim.port, baud, stop_event, poll_interval), daemon=True)
+        responder.start()
+
+        if not sim.handshake(timeout=10):
+            stop_event.set()
+            sim.close()
+            continue
+
+        sim.latencies = {}
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for cmd in commands:
+                sim.command(cmd)
+        elapsed = time.perf_counter() - start
+        total = iterations * len(commands)
+
+        print(f"\n[Bench] {baud} baud - {total} commands in {elapsed:.2f}s ({total / elapsed:.1f} cmd/s)")
+        sim.print_latencies()
+        results.append({'baud': baud, 'poll_interval_sec': poll_interval, 'commands_per_sec': total / elapsed,
+                        'latency_sec': {cmd: statistics.mean(v) for cmd, v in sim.latencies.items()}})
+
+        stop_event.set()
+        responder.join(timeout=2)
+        sim.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="PIGNITE logic Arduino simulator")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    seq = sub.add_parser("sequence", help="Run the ignition sequence against main.py")
+    seq.add_argument("--baud", type=int, default=None)
+    seq.add_argument("--time-scale", type=float, default=1.0, help="Scale burn steps and FIRESTATUS delay")
+    seq.add_argument("--final-timeout", type=float, default=None, help="Seconds to wait for FINAL")
+
+    bench = sub.add_parser("bench", help="UART round-trip latency benchmark")
+    bench.add_argument("--bauds", type=int, nargs="+", default=[9600, 57600, 115200])
+    bench.add_argument("-n", "--iterations", type=int, default=20)
+    bench.add_argument("--poll-interval", type=float, default=0.0,
+                       help="Responder sleep between polls in seconds (default 0, main.py uses UART_POLL_INTERVAL)")
+
+    args = parser.parse_args()
+
+    if args.mode == "bench":
+        benchmark(args.bauds, args.iterations, poll_interval=args.poll_interval)
+        sys.exit(0)
+
+    sim = ArduinoSimulator(baudrate=args.baud, time_scale=args.time_scale)
+    print(f"[Sim] Arduino on {sim.port} - start main.py with --uart-port {sim.port} --baud {sim.baudrate}")
+    try:
+        if sim.handshake(timeout=None):
+            sim.run_ignition_sequence(final_timeout=args.final_timeout)
+        print("\n[Sim] Command latencies:")
+        sim.print_latencies()
+    except KeyboardInterrupt:
+        print("\n[Sim] Interrupted")
+    finally:
+        sim.close()
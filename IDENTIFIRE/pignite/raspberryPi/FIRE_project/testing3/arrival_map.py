@@ -0,0 +1,171 @@
+# arrival_map.py
+# Spread metrics from a per-pixel time-of-first-burn map (NaN = never burned)
+
+import numpy as np
+import cv2
+import config
+import geometry
+
+
+def burn_mask_at(arrival, t):
+    """Pixels burned by elapsed time t."""
+    with np.errstate(invalid="ignore"):
+        return arrival <= t
+
+
+def burned_area_at(arrival, t, pixel_area=None):
+    """Burned area in cm² at elapsed time t (pixel_area: per-pixel cm² map, else uniform)."""
+    if pixel_area is None:
+        return np.count_nonzero(burn_mask_at(arrival, t)) * config.PIXEL_AREA_CM2
+    return float(np.sum(pixel_area, where=burn_mask_at(arrival, t)))
+
+
+def burn_progress(arrival, times, pixel_area=None):
+    """Burned area (cm²) for each time in times, without replaying frames."""
+    finite = np.isfinite(arrival)
+    order = np.argsort(arrival[finite])
+    burned = arrival[finite][order]
+    counts = np.searchsorted(burned, np.asarray(times, dtype=np.float32), side="right")
+    if pixel_area is None:
+        return counts * config.PIXEL_AREA_CM2
+    cumulative = np.concatenate(([0.0], np.cumsum(pixel_area[finite][order], dtype=np.float64)))
+    return cumulative[counts]
+
+
+def _positions(arrival, positions):
+    """Pixel-centre (x_cm, y_cm) maps matching arrival; the full-frame lens projection by default."""
+    x, y = positions if positions is not None else geometry.pixel_centres()
+    if x.shape != arrival.shape:
+        raise ValueError(f"positions {x.shape} do not match arrival map {arrival.shape} (pass the ROI-cropped centres)")
+    return x, y
+
+
+def spread_rate_map(arrival, positions=None):
+    """Local front speed in cm/s: 1 / |∇ arrival| with the gradient in s/cm on the sample plane.
+
+    positions: (x_cm, y_cm) pixel-centre maps (geometry.pixel_centres, cropped
+    like arrival); the pixel-index gradient is mapped through their Jacobian.
+    """
+    x, y = _positions(arrival, positions)
+    t_row, t_col = np.gradient(arrival.astype(np.float64))
+    x_row, x_col = np.gradient(x)
+    y_row, y_col = np.gradient(y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        det = x_col * y_row - x_row * y_col
+        grad_x = (t_col * y_row - t_row * y_col) / det
+        grad_y = (x_col * t_row - x_row * t_col) / det
+        slowness = np.hypot(grad_x, grad_y)
+        speed = np.where(slowness > 0, 1.0 / slowness, np.nan)
+    return speed.astype(np.float32)
+
+
+def _distances(arrival, positions, origin):
+    """(arrival times, plane offsets dx, dy in cm from origin) of every burned pixel, None if nothing burned."""
+    x, y = _positions(arrival, positions)
+    finite = np.isfinite(arrival)
+    if not np.any(finite):
+        return None
+    if origin is None:
+        # Centroid of the earliest-burning pixels, on the plane
+        first = arrival == np.nanmin(arrival)
+        origin = (x[first].mean(), y[first].mean())
+    return arrival[finite], x[finite] - origin[0], y[finite] - origin[1]
+
+
+def directional_spread_rate(arrival, angle_deg, half_width_deg=22.5, origin=None, positions=None):
+    """Linear ROS (cm/s) inside a sector around a direction (0° = +x / right, 90° = +y / down).
+
+    origin: (x_cm, y_cm) on the sample plane, default the ignition centroid.
+    """
+    burned = _distances(arrival, positions, origin)
+    if burned is None:
+        return 0.0
+    times, dx, dy = burned
+    offset = np.degrees(np.arctan2(dy, dx)) - angle_deg
+    in_sector = np.abs((offset + 180.0) % 360.0 - 180.0) <= half_width_deg
+
+    times = times[in_sector]
+    if len(times) < 2 or np.ptp(times) <= 0:
+        return 0.0
+    slope, _ = np.polyfit(times, np.hypot(dx, dy)[in_sector], 1)
+    return float(max(slope, 0.0))
+
+
+def ignition_point(arrival):
+    """(row, col) centroid of the earliest-burning pixels, None if nothing burned."""
+    finite = np.isfinite(arrival)
+    if not np.any(finite):
+        return None
+    first = arrival == np.nanmin(arrival)
+    rows, cols = np.nonzero(first)
+    return rows.mean(), cols.mean()
+
+
+def linear_spread_rate(arrival, origin=None, positions=None):
+    """Overall linear ROS (cm/s): slope of plane distance from ignition vs arrival time."""
+    if arrival is None:
+        return 0.0
+    burned = _distances(arrival, positions, origin)
+    if burned is None:
+        return 0.0
+    times, dx, dy = burned
+    if len(times) < 2 or np.ptp(times) <= 0:
+        return 0.0
+    slope, _ = np.polyfit(times, np.hypot(dx, dy), 1)
+    return float(max(slope, 0.0))
+
+
+def isochrones(arrival, times):
+    """{t: contours} of the burned region at each time."""
+    result = {}
+    for t in times:
+        mask = burn_mask_at(arrival, t).astype(np.uint8) * 255
+        contours_info = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        result[t] = contours_info[0] if len(contours_info) == 2 else contours_info[1]
+    return result
+
+
+def save_isochrone_plot(arrival, path, num_lines=8, scale=4):
+    """Draw evenly spaced isochrones over the arrival map and write an image."""
+    finite = np.isfinite(arrival)
+    if not np.any(finite):
+        return None
+
+    t_min, t_max = float(np.nanmin(arrival)), float(np.nanmax(arrival))
+    background = np.zeros(arrival.shape, dtype=np.uint8)
+    if t_max > t_min:
+        background[finite] = (255 - (arrival[finite] - t_min) / (t_max - t_min) * 200).astype(np.uint8)
+    image = cv2.applyColorMap(background, cv2.COLORMAP_INFERNO)
+    image[~finite] = 0
+    image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+
+    times = np.linspace(t_min, t_max, num_lines + 1)[1:]
+    for t, contours in isochrones(arrival, times).items():
+        scaled = [c * scale for c in contours]
+        cv2.drawContours(image, scaled, -1, (255, 255, 255), 1)
+        if scaled:
+            x, y = scaled[0][0][0]
+            cv2.putText(image, f"{t:.0f}s", (int(x), int(y)), cv2.FONT_HERSHEY_SIMPLEX, 0.35, (255, 255, 255), 1)
+
+    cv2.imwrite(path, image)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Spread metrics from an exported arrival-time map")
+    parser.add_argument("maps", nargs="?", default=config.MAPS_FILE, help=".npz written by BurnAnalyzer.export_maps")
+    parser.add_argument("--plot", default=None, help="Write an isochrone image (e.g. isochrones.png)")
+    args = parser.parse_args()
+
+    maps = np.load(args.maps)
+    arrival = maps["arrival_time_sec"]
+    pixel_area = maps["pixel_area_cm2"] if "pixel_area_cm2" in maps else None
+    print(f"Burned area: {burned_area_at(arrival, np.inf, pixel_area):.2f} cm²")
+    print(f"Linear ROS: {linear_spread_rate(arrival):.3f} cm/s")
+    for angle in (0, 90, 180, 270):
+        print(f"  {angle:3d}°: {directional_spread_rate(arrival, angle):.3f} cm/s")
+    if args.plot:
+        save_isochrone_plot(arrival, args.plot)
+        print(f"Isochrones → {args.plot}")
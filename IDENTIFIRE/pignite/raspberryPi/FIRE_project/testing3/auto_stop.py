@@ -0,0 +1,54 @@
+# auto_stop.py
+# Auto-stop state machine: WAITING → BURNING → STOPPED, driven by the windowed ROS
+
+import config
+import fire_log
+
+log = fire_log.get_logger("autostop")
+
+WAITING = "waiting"     # fire not confirmed lit yet (FIRESTATUS / FORCE not seen)
+BURNING = "burning"     # fire lit, watching for the spread to stop
+STOPPED = "stopped"     # terminal until the analyzer is reset
+
+FIRE_LIT = "fire_lit"
+FIRE_STOPPED = "fire_stopped"
+
+
+class AutoStop:
+    """Emits FIRE_LIT once when armed and FIRE_STOPPED once after MIN_ZERO_FRAMES quiet frames."""
+
+    def __init__(self, events, ros_threshold=None, min_zero_frames=None):
+        self.events = events
+        self.ros_threshold = config.ROS_STOP_THRESHOLD if ros_threshold is None else ros_threshold
+        self.min_zero_frames = config.MIN_ZERO_FRAMES if min_zero_frames is None else min_zero_frames
+        self.state = WAITING
+        self.zero_streak = 0
+        self.stop_time = None
+
+    @property
+    def fire_active(self):
+        return self.state != WAITING
+
+    def arm(self, elapsed_time=None):
+        """Fire confirmed lit; only the first call has an effect."""
+        if self.state != WAITING:
+            return
+        self.state = BURNING
+        log.info("fire lit", extra={"fields": {"elapsed_sec": elapsed_time}})
+        self.events.emit(FIRE_LIT, elapsed_sec=elapsed_time)
+
+    def update(self, ros, elapsed_time, samples_stopped=False, trace_id=None):
+        """Feed one frame's windowed ROS; returns True on the frame that stops the burn."""
+        if self.state != BURNING:
+            return False
+        self.zero_streak = self.zero_streak + 1 if ros < self.ros_threshold else 0
+        if self.zero_streak < self.min_zero_frames and not samples_stopped:
+            return False
+
+        self.state = STOPPED
+        self.stop_time = elapsed_time
+        reason = "samples" if samples_stopped else "ros"
+        log.info("fire stopped", extra={"trace": trace_id, "fields": {
+            "reason": reason, "ros_threshold": self.ros_threshold, "zero_streak": self.zero_streak}})
+        self.events.emit(FIRE_STOPPED, elapsed_sec=elapsed_time, reason=reason)
+        return True
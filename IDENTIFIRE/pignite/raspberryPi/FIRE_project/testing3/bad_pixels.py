@@ -0,0 +1,109 @@
+# bad_pixels.py
+# Dead / stuck / flickering Lepton pixels, learned from ambient frames and
+# replaced at ingest by their nearest good neighbour
+
+import os
+import numpy as np
+import config
+import utils
+
+
+class BadPixelMap:
+    """Flat indices of bad pixels and of the good pixel that replaces each one."""
+
+    def __init__(self, mask):
+        self.mask = np.asarray(mask, dtype=bool)
+        self.bad_index = np.flatnonzero(self.mask)
+        self.source_index = self._nearest_good(self.mask)
+
+    @staticmethod
+    def _nearest_good(mask):
+        height, width = mask.shape
+        sources = []
+        for row, col in zip(*np.nonzero(mask)):
+            # Grow a square ring until it holds a good pixel, take the closest one
+            for radius in range(1, max(height, width)):
+                r0, r1 = max(row - radius, 0), min(row + radius + 1, height)
+                c0, c1 = max(col - radius, 0), min(col + radius + 1, width)
+                good_rows, good_cols = np.nonzero(~mask[r0:r1, c0:c1])
+                if len(good_rows):
+                    distance = (good_rows + r0 - row) ** 2 + (good_cols + c0 - col) ** 2
+                    best = np.argmin(distance)
+                    sources.append((good_rows[best] + r0) * width + good_cols[best] + c0)
+                    break
+        return np.asarray(sources, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.bad_index)
+
+    def correct(self, raw_frame):
+        """Replace bad pixels in place (one gather); returns the frame."""
+        flat = raw_frame.reshape(-1)
+        flat[self.bad_index] = flat[self.source_index]
+        return raw_frame
+
+    @classmethod
+    def learn(cls, raw_frames):
+        """Bad pixels from a stack of ambient raw frames.
+
+        Outliers in the per-pixel temporal median, hotter or colder by more
+        than the allowed deviation than all but one of their 8 neighbours
+        (stuck hot / cold, alone or in pairs; a pixel on a real edge or
+        corner always has at least 2 neighbours on its side), zero readings
+        (dead), and pixels much noisier over time than the frame's typical
+        pixel (flickering).
+        """
+        frames = np.asarray(raw_frames, dtype=np.uint16)
+        median = np.median(frames, axis=0).astype(np.int32)
+        height, width = median.shape
+        padded = np.pad(median, 1, mode="reflect")
+        neighbours = np.sort([padded[1 + dr:1 + dr + height, 1 + dc:1 + dc + width]
+                              for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc], axis=0)
+        max_deviation = config.BAD_PIXEL_MAX_DEVIATION_C * 100   # raw units are 0.01 K
+        mask = (median > neighbours[-2] + max_deviation) | (median < neighbours[1] - max_deviation)
+        mask |= median == 0
+        if len(frames) > 2:
+            noise = frames.std(axis=0)
+            mask |= noise > config.BAD_PIXEL_NOISE_FACTOR * max(float(np.median(noise)), 1.0)
+        return cls(mask)
+
+    def save(self, path):
+        utils.ensure_dir(os.path.dirname(path) or ".")
+        np.save(path, self.mask)
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path))
+
+
+def cache_path(camera_id=None):
+    return os.path.join(config.BAD_PIXEL_CACHE_DIR, f"{camera_id or config.CAMERA_ID}.npy")
+
+
+def load_cached(camera_id=None):
+    """Persisted map for the camera, None if it has not been learned yet."""
+    path = cache_path(camera_id)
+    if not os.path.exists(path):
+        return None
+    return BadPixelMap.load(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Learn and cache the bad-pixel map from ambient frames")
+    parser.add_argument("folder", nargs="?", default=config.CAPTURE_FOLDER, help="Folder with ambient .gray frames")
+    parser.add_argument("--frames", type=int, default=config.BAD_PIXEL_LEARN_FRAMES)
+    parser.add_argument("--camera", default=config.CAMERA_ID)
+    args = parser.parse_args()
+
+    paths = utils.list_frame_files(args.folder)[:args.frames]
+    if not paths:
+        raise SystemExit(f"No frames in {args.folder}")
+
+    bad = BadPixelMap.learn([utils.read_raw_gray(p) for p in paths])
+    bad.save(cache_path(args.camera))
+    rows, cols = np.nonzero(bad.mask)
+    print(f"Camera {args.camera}: {len(bad)} bad pixels from {len(paths)} frames → {cache_path(args.camera)}")
+    for row, col in list(zip(rows, cols))[:20]:
+        print(f"  ({col}, {row})")
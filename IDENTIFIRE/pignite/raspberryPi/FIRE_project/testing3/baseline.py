@@ -0,0 +1,52 @@
+# baseline.py
+# Rolling ambient baseline from an incremental histogram of raw Lepton values
+
+import collections
+import numpy as np
+import config
+import utils
+
+
+class RollingHistogramBaseline:
+    """Percentile of recent unburned pixels, kept as a windowed histogram.
+
+    Raw uint16 values are binned by a right shift, each update adds one
+    frame's histogram and drops the oldest once the window is full, so a
+    percentile query is a cumulative sum over the bins instead of a sort.
+    """
+
+    def __init__(self, percentile=50, window_updates=None, shift=None):
+        self.percentile = percentile
+        self.window_updates = window_updates or config.BASELINE_WINDOW_UPDATES
+        self.shift = shift if shift is not None else config.BASELINE_HIST_SHIFT
+        self.num_bins = 65536 >> self.shift
+
+        self.window = collections.deque()
+        self.total = np.zeros(self.num_bins, dtype=np.int64)
+        self.count = 0
+
+    def update(self, raw_values):
+        """Add one frame's unburned raw values (any shape); the window holds window_updates calls."""
+        hist = np.bincount((raw_values >> self.shift).reshape(-1), minlength=self.num_bins).astype(np.int32)
+        self.window.append(hist)
+        self.total += hist
+        self.count += raw_values.size
+
+        if len(self.window) > self.window_updates:
+            old = self.window.popleft()
+            self.total -= old
+            self.count -= int(old.sum())
+
+    def percentile_raw(self):
+        """Raw value (bin centre) at the configured percentile, None if empty."""
+        if self.count == 0:
+            return None
+        target = self.count * self.percentile / 100.0
+        index = int(np.searchsorted(np.cumsum(self.total), target))
+        return (index << self.shift) + (1 << self.shift) / 2.0
+
+    def percentile_celsius(self):
+        raw = self.percentile_raw()
+        if raw is None:
+            return None
+        return float(utils.raw_to_celsius(np.float32(raw)))
@@ -0,0 +1,188 @@
+# batch_reprocess.py
+# Re-analyze a library of recorded sessions in parallel, skipping unchanged ones
+#
+#   python3 batch_reprocess.py /data/burns --workers 4
+#
+# A session is any sub-folder holding capture frames. Results go to
+# <session>/burn_analysis_results.json + burn_maps.npz, and one line per session
+# into <library>/reprocess_index.json, rewritten after every finished session
+# so an interrupted run resumes where it stopped.
+
+import io
+import os
+import ast
+import json
+import time
+import hashlib
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import utils
+import bad_pixels
+
+INDEX_NAME = "reprocess_index.json"
+RESULTS_NAME = "burn_analysis_results.json"
+MAPS_NAME = "burn_maps.npz"
+
+def analyzer_sources(entry="burn_analyzer.py"):
+    """Local modules the analyzer imports, directly or indirectly (plus entry itself), sorted."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    found, pending = set(), [entry]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        found.add(name)
+        with open(os.path.join(here, name)) as f:
+            tree = ast.parse(f.read(), name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                path = module.split(".")[0] + ".py"
+                if os.path.exists(os.path.join(here, path)):
+                    pending.append(path)
+    return sorted(found)
+
+
+def analyzer_version(bad_pixel_path=None):
+    """Hash of every analysis source file and of the bad-pixel map applied, if any."""
+    digest = hashlib.sha1()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in analyzer_sources():
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(name.encode() + b"\0" + f.read())
+    if bad_pixel_path:
+        with open(bad_pixel_path, "rb") as f:
+            digest.update(b"bad_pixels\0" + f.read())
+    return digest.hexdigest()[:12]
+
+
+def input_fingerprint(frame_paths):
+    """Hash of frame names, sizes and modification times (not contents, to keep the scan cheap)."""
+    digest = hashlib.sha1()
+    for path in frame_paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def find_sessions(library):
+    """{session name: sorted frame paths} for every sub-folder holding frames."""
+    sessions = {}
+    for root, dirs, _ in os.walk(library):
+        dirs.sort()
+        for name in dirs:
+            folder = os.path.join(root, name)
+            frames = utils.list_frame_files(folder)
+            if frames:
+                sessions[os.path.relpath(folder, library)] = frames
+    return sessions
+
+
+def load_index(library):
+    path = os.path.join(library, INDEX_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_index(library, index):
+    path = os.path.join(library, INDEX_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def reprocess_session(folder, frame_paths, bad_pixel_path=None):
+    """Analyze one session from disk, write its results, return (summary, seconds)."""
+    from burn_analyzer import BurnAnalyzer
+
+    start = time.perf_counter()
+    # Offline replay: auto-stop is never armed without FIRESTATUS / FORCE, and frames
+    # are only corrected with a bad-pixel map given explicitly (sessions may be from other cameras)
+    bad_pixel_map = bad_pixels.BadPixelMap.load(bad_pixel_path) if bad_pixel_path else None
+    analyzer = BurnAnalyzer(bad_pixel_map=bad_pixel_map)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for path in frame_paths:
+            analyzer.analyze_raw(utils.read_raw_gray(path), source_frame=utils.extract_frame_number(path))
+
+    summary = analyzer.get_summary_statistics()
+    with open(os.path.join(folder, RESULTS_NAME), "w") as f:
+        json.dump(summary, f, indent=2, default=str)
+    analyzer.export_maps(os.path.join(folder, MAPS_NAME))
+    return summary, time.perf_counter() - start
+
+
+def reprocess_library(library, workers=None, force=False, bad_pixel_path=None):
+    """Reprocess every stale session; returns (processed, skipped, failed, frames, seconds)."""
+    version = analyzer_version(bad_pixel_path)
+    index = load_index(library)
+    sessions = find_sessions(library)
+
+    pending = {}
+    for name, frames in sessions.items():
+        fingerprint = input_fingerprint(frames)
+        entry = index.get(name)
+        if (not force and entry and entry.get("fingerprint") == fingerprint
+                and entry.get("analyzer_version") == version and "summary" in entry):
+            continue
+        pending[name] = (frames, fingerprint)
+
+    skipped = len(sessions) - len(pending)
+    print(f"[Batch] {len(sessions)} sessions, {skipped} up to date, {len(pending)} to process (analyzer {version})")
+
+    processed = failed = total_frames = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(reprocess_session, os.path.join(library, name), frames, bad_pixel_path): name
+                   for name, (frames, _) in pending.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            frames, fingerprint = pending[name]
+            try:
+                summary, seconds = future.result()
+            except Exception as e:
+                failed += 1
+                index[name] = {"fingerprint": fingerprint, "analyzer_version": version, "error": str(e)}
+                print(f"[Batch] {name}: FAILED ({e})")
+            else:
+                processed += 1
+                total_frames += len(frames)
+                index[name] = {
+                    "fingerprint": fingerprint,
+                    "analyzer_version": version,
+                    "frames": len(frames),
+                    "seconds": round(seconds, 2),
+                    "processed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "summary": summary,
+                }
+                print(f"[Batch] {name}: {len(frames)} frames, "
+                      f"{summary['final_burn_area_cm2']:.1f} cm² ({len(frames) / seconds:.0f} FPS)")
+            save_index(library, index)
+
+    elapsed = time.perf_counter() - start
+    return processed, skipped, failed, total_frames, elapsed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-analyze every recorded session under a folder")
+    parser.add_argument("library", help="Folder containing one sub-folder per recorded session")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Reprocess sessions even if unchanged")
+    parser.add_argument("--bad-pixel-map", default=None, metavar="NPY",
+                        help="Bad-pixel map of the recording camera (default: no correction)")
+    args = parser.parse_args()
+
+    processed, skipped, failed, frames, elapsed = reprocess_library(args.library, args.workers, args.force,
+                                                                 args.bad_pixel_map)
+    fps = frames / elapsed if elapsed > 0 else 0.0
+    print(f"[Batch] Done: {processed} processed, {skipped} skipped, {failed} failed, "
+          f"{frames} frames in {utils.format_duration(elapsed)} ({fps:.0f} FPS aggregate)")
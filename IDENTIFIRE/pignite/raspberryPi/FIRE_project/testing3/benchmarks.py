@@ -0,0 +1,103 @@
+# benchmarks.py
+# Micro-benchmarks for per-frame processing stages, run on the Pi itself
+#
+#   python3 benchmarks.py            # all benchmarks
+#   python3 benchmarks.py otsu       # selected ones
+
+import time
+import numpy as np
+import cv2
+import config
+import utils
+import detectors
+import temporal_filter
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark function under name."""
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def time_call(function, *args, repeat=200):
+    """Median seconds per call over repeat calls."""
+    function(*args)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def synthetic_raw_frame(hot_radius=25, seed=0):
+    """Big-endian raw frame as stored in .gray files: 25 °C background with a 300 °C disc."""
+    rng = np.random.default_rng(seed)
+    celsius = np.full((config.IMAGE_HEIGHT, config.IMAGE_WIDTH), 25.0) + rng.normal(0, 0.5, (config.IMAGE_HEIGHT, config.IMAGE_WIDTH))
+    yy, xx = np.mgrid[0:config.IMAGE_HEIGHT, 0:config.IMAGE_WIDTH]
+    celsius[(yy - config.IMAGE_HEIGHT // 2) ** 2 + (xx - config.IMAGE_WIDTH // 2) ** 2 < hot_radius ** 2] = 300.0
+    return ((celsius + 273.15) * 100).astype(config.DTYPE_RAW)
+
+
+def report(name, seconds, note=""):
+    print(f"  {name:<28} {seconds * 1e6:9.1f} µs  {note}")
+
+
+@benchmark("otsu")
+def bench_otsu():
+    """Original float-normalized 8-bit OpenCV Otsu (on °C) vs the raw-value Otsu backends."""
+    raw = synthetic_raw_frame().astype(np.uint16)
+
+    def float_path(celsius_frame):
+        frame_uint8 = utils.normalize_to_uint8(celsius_frame)
+        _, thresh = cv2.threshold(frame_uint8, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return thresh
+
+    celsius = utils.raw_to_celsius(raw)
+    reference = float_path(celsius) > 0
+    report("normalize + cv2 Otsu (°C)", time_call(float_path, celsius))
+    for name, (function, exact) in detectors.OTSU_BACKENDS.items():
+        threshold = function(raw)
+        threshold_c = float(utils.raw_to_celsius(np.uint16(threshold)))
+        report(name, time_call(function, raw),
+               f"threshold {threshold_c:.2f} °C, {np.count_nonzero(reference != (raw > threshold))} px differ"
+               + ("" if exact else " (inexact)"))
+
+
+@benchmark("detectors")
+def bench_detectors():
+    """Registered burn-detection compare backends on a native raw frame."""
+    native = synthetic_raw_frame().astype(np.uint16)
+    threshold = detectors.raw_threshold(config.MIN_BURN_TEMP_ABSOLUTE)
+    out = np.zeros(native.shape, np.uint8)
+    for name, function in detectors.DETECTORS.items():
+        report(name, time_call(function, native, out, threshold))
+
+
+@benchmark("temporal")
+def bench_temporal():
+    """Temporal filter stage per frame (state updated in place)."""
+    frames = [synthetic_raw_frame(seed=i).astype(np.uint16) for i in range(8)]
+    for kind in temporal_filter.FILTERS:
+        stage = temporal_filter.make_filter(kind, frames[0].shape)
+        cycle = iter(frames * 1000)
+        report(kind, time_call(lambda: stage.apply(next(cycle))))
+
+
+def run(names=None):
+    for name in names or BENCHMARKS:
+        print(f"[Benchmark] {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-frame stage micro-benchmarks")
+    parser.add_argument("names", nargs="*", help=f"Subset of: {', '.join(BENCHMARKS)}")
+    args = parser.parse_args()
+    run(args.names)
@@ -1,5 +1,7 @@
 import pigpio
 import time
+import threading
+import queue
 
 # -----------------------------
 # Configuration
@@ -8,56 +10,145 @@ TX = 18  # GPIO pin for TX (output)
 RX = 27  # GPIO pin for RX (input)
 BAUD = 9600  # Use the working baud rate
 
-# -----------------------------
-# Initialize pigpio
-# -----------------------------
-pi = pigpio.pi()
-if not pi.connected:
-    print("Failed to connect to pigpio daemon")
-    exit()
+# Leave headroom in the pigpio pulse pool for other waveforms
+PULSE_BUDGET_FRACTION = 0.9
 
-pi.set_mode(TX, pigpio.OUTPUT)
-pi.set_mode(RX, pigpio.INPUT)
-
-# Initialize RX for software serial
-pi.bb_serial_read_open(RX, BAUD)
 
 # -----------------------------
-# Bit-banged TX function (already working)
+# Waveform encoding
 # -----------------------------
-def bb_serial_send_wave(pi, tx_pin, text, baud=9600):
-    data_bytes = text.encode('utf-8')
-    bit_time_us = int(1e6 / baud)  # microseconds per bit
+def encode_pulses(data_bytes, tx_pin, baud=9600):
+    """Encode bytes as 8N1 pulses; runs of equal bits are merged into one pulse.
 
+    Bit edges are placed at round(n * 1e6 / baud) so the per-bit rounding
+    error does not accumulate over a long message.
+    """
+    mask = 1 << tx_pin
+    levels = []
     for byte in data_bytes:
-        wf = []
+        levels.append(0)                                   # Start bit (LOW)
+        levels.extend((byte >> i) & 1 for i in range(8))   # Data bits LSB first
+        levels.append(1)                                   # Stop bit (HIGH)
 
-        # Start bit (LOW)
-        wf.append(pigpio.pulse(0, 1 << tx_pin, bit_time_us))
-
-        # Data bits LSB first
-        for i in range(8):
-            if (byte >> i) & 1:
-                wf.append(pigpio.pulse(1 << tx_pin, 0, bit_time_us))  # HIGH
+    pulses = []
+    run_start = 0
+    for i in range(1, len(levels) + 1):
+        if i == len(levels) or levels[i] != levels[run_start]:
+            start_us = round(run_start * 1e6 / baud)
+            end_us = round(i * 1e6 / baud)
+            if levels[run_start]:
+                pulses.append(pigpio.pulse(mask, 0, end_us - start_us))
             else:
-                wf.append(pigpio.pulse(0, 1 << tx_pin, bit_time_us))  # LOW
+                pulses.append(pigpio.pulse(0, mask, end_us - start_us))
+            run_start = i
+    return pulses
+
+
+def chunk_message(data_bytes, max_pulses):
+    """Split a message so no chunk can need more than max_pulses (10 per byte worst case)."""
+    bytes_per_chunk = max(1, max_pulses // 10)
+    return [data_bytes[i:i + bytes_per_chunk] for i in range(0, len(data_bytes), bytes_per_chunk)]
+
+
+class HM10Transmitter:
+    """Bit-banged HM-10 TX that sends a whole message as one chained waveform.
+
+    send() blocks until the message is on the wire, send_async() queues it
+    for a background thread.
+    """
+
+    def __init__(self, pi, tx_pin=TX, baud=BAUD):
+        self.pi = pi
+        self.tx_pin = tx_pin
+        self.baud = baud
+        self.max_pulses = int(pi.wave_get_max_pulses() * PULSE_BUDGET_FRACTION)
+        self.queue = queue.Queue()
+        self.worker = None
+
+        pi.set_mode(tx_pin, pigpio.OUTPUT)
+        pi.write(tx_pin, 1)  # Idle HIGH
+
+    def send(self, text):
+        """Encode and transmit text, chaining waves within pigpio's pulse limit."""
+        data_bytes = text.encode('utf-8') if isinstance(text, str) else bytes(text)
+        chunks = chunk_message(data_bytes, self.max_pulses)
+
+        batch = []
+        batch_pulses = 0
+        for chunk in chunks:
+            pulses = encode_pulses(chunk, self.tx_pin, self.baud)
+            if batch and batch_pulses + len(pulses) > self.max_pulses:
+                self._transmit(batch)
+                batch, batch_pulses = [], 0
+            batch.append(pulses)
+            batch_pulses += len(pulses)
 
-        # Stop bit (HIGH)
-        wf.append(pigpio.pulse(1 << tx_pin, 0, bit_time_us))
+        if batch:
+            self._transmit(batch)
 
-        # Send waveform
-        pi.wave_add_generic(wf)
-        wid = pi.wave_create()
-        if wid >= 0:
-            pi.wave_send_once(wid)
-            while pi.wave_tx_busy():
+    def _transmit(self, batch):
+        wave_ids = []
+        duration_us = 0
+        try:
+            for pulses in batch:
+                self.pi.wave_add_generic(pulses)
+                wid = self.pi.wave_create()
+                if wid < 0:
+                    raise RuntimeError(f"wave_create failed ({wid})")
+                wave_ids.append(wid)
+                duration_us += sum(p.delay for p in pulses)
+
+            self.pi.wave_chain(wave_ids)
+
+            # Sleep for the known airtime, then only poll for the tail
+            time.sleep(duration_us / 1e6)
+            while self.pi.wave_tx_busy():
                 time.sleep(0.001)
-            pi.wave_delete(wid)
+        finally:
+            for wid in wave_ids:
+                self.pi.wave_delete(wid)
+
+    def send_async(self, text):
+        """Queue text for the background sender, returns immediately."""
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._worker, name="HM10-TX", daemon=True)
+            self.worker.start()
+        self.queue.put(text)
+
+    def _worker(self):
+        while True:
+            text = self.queue.get()
+            if text is None:
+                self.queue.task_done()
+                break
+            try:
+                self.send(text)
+            except Exception as e:
+                print(f"[Bluetooth] Send error: {e}")
+            self.queue.task_done()
+
+    def flush(self):
+        """Wait until every queued message has been sent."""
+        self.queue.join()
+
+    def close(self):
+        if self.worker is not None:
+            self.queue.put(None)
+            self.worker.join(timeout=5)
+            self.worker = None
+
+
+# -----------------------------
+# Bit-banged TX function (kept for existing callers)
+# -----------------------------
+def bb_serial_send_wave(pi, tx_pin, text, baud=9600):
+    HM10Transmitter(pi, tx_pin, baud).send(text)
 
 # -----------------------------
 # Menu loop
 # -----------------------------
-def menu():
+def menu(pi):
+    transmitter = HM10Transmitter(pi, TX, 19600)
     while True:
         print("\n=== HM-10 Menu ===")
         print("1: Send a message")
@@ -66,11 +157,8 @@ def menu():
         choice = input("Enter choice: ").strip()
 
         if choice == "1":
-            for x in [10,20,30,40,10,20,100,150,-23,-53]:
-                BAUD = 19600
-                #msg = input("Enter message to send: ")
-                bb_serial_send_wave(pi, TX, str(x) + "\r\n", BAUD)
-                time.sleep(0.1)
+            #msg = input("Enter message to send: ")
+            transmitter.send("".join(str(x) + "\r\n" for x in [10,20,30,40,10,20,100,150,-23,-53]))
             print("Message sent!")
         elif choice == "2":
             BAUD = 9600
@@ -97,10 +185,24 @@ def menu():
 # -----------------------------
 # Run the menu
 # -----------------------------
-try:
-    menu()
-finally:
-    # Cleanup
-    pi.bb_serial_read_close(RX)
-    pi.stop()
+if __name__ == "__main__":
+    # -----------------------------
+    # Initialize pigpio
+    # -----------------------------
+    pi = pigpio.pi()
+    if not pi.connected:
+        print("Failed to connect to pigpio daemon")
+        exit()
+
+    pi.set_mode(TX, pigpio.OUTPUT)
+    pi.set_mode(RX, pigpio.INPUT)
+
+    # Initialize RX for software serial
+    pi.bb_serial_read_open(RX, BAUD)
 
+    try:
+        menu(pi)
+    finally:
+        # Cleanup
+        pi.bb_serial_read_close(RX)
+        pi.stop()
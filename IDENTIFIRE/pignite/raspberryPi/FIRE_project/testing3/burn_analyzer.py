@@ -2,19 +2,102 @@ import numpy as np
 import cv2
 import config
 import utils
+import arrival_map
+import detectors
+import geometry
+from active_regions import ActiveRegionTracker
+from roi import resolve_roi
+from baseline import RollingHistogramBaseline
+from fire_front import FireFrontTracker
+from ros_estimator import WindowedRosEstimator
+from events import EventBus
+import auto_stop
+import bad_pixels
+import temporal_filter
 import threading
-import importlib
+import collections
+import zlib
+import pickle
+import time
+import fire_log
+import metrics
+
+log = fire_log.get_logger("analyzer")
 
 class BurnAnalyzer:
     """Analyzes thermal sequences to calculate burn propagation and Rate of Spread."""
     
-    def __init__(self, temp_threshold_delta=None, baseline_percentile=None):
+    # Left out of snapshot_state(): runtime wiring, per-frame scratch, and the
+    # frame history (journaled separately, see checkpoint.py)
+    _SNAPSHOT_SKIP = ('lock', 'events', 'auto_stop', 'frame_listeners', 'frame_data',
+                      'burning', 'detect_buffer', 'scratch', 'area_weights')
+    # uint8 0/255 masks stored at one bit per pixel
+    _SNAPSHOT_PACKED = ('cumulative_burn_mask', 'current_burn_mask')
+    
+    def __init__(self, temp_threshold_delta=None, baseline_percentile=None, active_regions=None, roi=None,
+                 temporal_filter_kind=None, live_camera=False, bad_pixel_map=None):
         self.temp_threshold_delta = temp_threshold_delta or config.BURN_TEMP_DELTA
         self.baseline_percentile = baseline_percentile or 50
+        # Denoises the raw detection input; created with the baseline once the shape is known
+        self.temporal_filter_kind = temporal_filter_kind if temporal_filter_kind is not None else config.TEMPORAL_FILTER
+        self.temporal_filter = None
+        # Only meaningful for the per-pixel temperature detector, Otsu needs the whole frame
+        if active_regions is None:
+            active_regions = config.ACTIVE_REGION_TRACKING
+        self.active_regions = active_regions and config.EDGE_DETECTION_METHOD == "temperature"
+        self.region_tracker = None
+        self.fire_front = None
+        self.current_burn_mask = None
+        self.detector = None
+        self.otsu = None
+        self.detect_buffer = None
+        # RegionOfInterest; resolved from config on the first frame when None.
+        # All per-frame arrays below live in ROI-window coordinates.
+        self.roi = roi
         
         self.baseline_temp = None
+        self.rolling_baseline = None
         self.cumulative_burn_mask = None
+        self.cumulative_burn_pixels = 0
+        self.cumulative_burn_area = 0.0
+        self.area_weights = None
+        self.roi_area_cm2 = None
+        self.arrival_time_map = None
+        # Burn-severity maps, updated in place every frame
+        self.peak_raw_map = None
+        self.residence_time_map = None
+        self.temp_integral_map = None
+        self.burning = None
+        self.scratch = None
         self.frame_count = 0
+        # Frames consumed so far, duplicates included (the capture time base); the
+        # index is taken in the same critical section that uses it, so time only moves forward
+        self.frames_received = 0
+        self.last_fingerprint = None
+        self.duplicate_frames = 0
+        
+        # Pre-ignition watch (see config.PRE_IGNITION_WATCH); the first frame
+        # always runs the full pipeline to set the ROI and baseline
+        self.watching = config.PRE_IGNITION_WATCH and config.EDGE_DETECTION_METHOD == "temperature"
+        self.watch_ring = collections.deque(maxlen=config.WATCH_RING_SIZE)
+        self.watched_frames = 0
+        self.watch_max_raw = 0
+        self.watch_hot_pixels = 0
+        # Windowed rate of the raw hot area while watching: answers FIRESTATUS on the hotspot
+        # frame, before the full pipeline has a window of post-hotspot frames of its own
+        self.watch_ros_estimator = WindowedRosEstimator(config.ROS_WINDOW_FRAMES)
+        self.watch_ros = 0.0
+        self.watch_ros_until = -1
+        # Elapsed time of the latest received frame, watched ones included
+        self.last_elapsed = 0.0
+        
+        # Bad-pixel map: the live camera uses its cached map, learned from the first ambient
+        # frames if missing; offline replays only correct with a map passed in explicitly
+        self.live_camera = live_camera
+        if bad_pixel_map is None and live_camera and config.BAD_PIXEL_CORRECTION:
+            bad_pixel_map = bad_pixels.load_cached()
+        self.bad_pixel_map = bad_pixel_map
+        self.bad_pixel_frames = [] if live_camera and config.BAD_PIXEL_CORRECTION and bad_pixel_map is None else None
         self.first_frame_time = None
         self.frame_data = []
         
@@ -22,31 +105,112 @@ class BurnAnalyzer:
         self.ignition_time = None
         self.actual_fps = None
 
-        self.ros_zero_streak = 0
+        # Sensitivity sweep: highest threshold band each pixel has ever exceeded
+        self.sensitivity_deltas = sorted(config.SENSITIVITY_DELTAS) if config.SENSITIVITY_DELTAS else None
+        self.sensitivity_band_map = None
+        
+        # Per-sample state (multi-sample ROI only), index 0 = first sample
+        self.sample_area_cm2 = None
+        self.sample_cumulative_pixels = None
+        self.sample_cumulative_area = None
+        self.sample_ignition_time = None
+        self.sample_zero_streak = None
+        self.sample_stop_time = None
+
+        self.sample_ros_estimator = None
+
+        # Windowed-regression ROS drives stop detection, the instantaneous one is kept for reporting
+        self.ros_estimator = WindowedRosEstimator(config.ROS_WINDOW_FRAMES)
         self.ROS_STOP_THRESHOLD = config.ROS_STOP_THRESHOLD
         self.MIN_ZERO_FRAMES = config.MIN_ZERO_FRAMES
-        self.has_auto_stopped = False
-        self.auto_stop_callback = None
+        # Fresh bus every run: subscribers (auto_stop.FIRE_LIT / FIRE_STOPPED) re-register after reset()
+        self.events = EventBus()
+        self.auto_stop = auto_stop.AutoStop(self.events, self.ROS_STOP_THRESHOLD, self.MIN_ZERO_FRAMES)
+
+        # Called as listener(frame_result, celsius_data, cumulative_burn_mask) after each frame
+        self.frame_listeners = []
+
+        self.last_source_frame = None
+        self.dropped_frames = 0
+        self.out_of_order_frames = 0
+        self.lock = threading.Lock()
 
 
         
     def reset(self):
-        self.__init__(self.temp_threshold_delta, self.baseline_percentile)
+        listeners = self.frame_listeners
+        self.__init__(self.temp_threshold_delta, self.baseline_percentile, self.active_regions, self.roi,
+                      self.temporal_filter_kind, self.live_camera, self.bad_pixel_map)
+        self.frame_listeners = listeners
     
-    def _establish_baseline(self, celsius_frame):
-        self.baseline_temp = np.percentile(celsius_frame, self.baseline_percentile)
+    def _establish_baseline(self, celsius_frame, raw_frame):
+        if config.BASELINE_MODE == "rolling":
+            self.rolling_baseline = RollingHistogramBaseline(self.baseline_percentile)
+            self.rolling_baseline.update(raw_frame if self.roi.mask is None else raw_frame[self.roi.mask])
+            self.baseline_temp = self.rolling_baseline.percentile_celsius()
+        else:
+            roi_values = celsius_frame if self.roi.mask is None else celsius_frame[self.roi.mask]
+            self.baseline_temp = np.percentile(roi_values, self.baseline_percentile)
         self.cumulative_burn_mask = np.zeros(celsius_frame.shape, dtype=np.uint8)
+        # Elapsed seconds at which each pixel first burned, NaN = never
+        self.arrival_time_map = np.full(celsius_frame.shape, np.nan, dtype=np.float32)
+        # Peak kept in raw units (Kelvin × 100): exact, uint16 and no conversion
+        self.peak_raw_map = raw_frame.copy()
+        self.residence_time_map = np.zeros(celsius_frame.shape, dtype=np.float32)
+        self.burning = np.zeros(celsius_frame.shape, dtype=bool)
+        if config.TEMP_INTEGRAL_MAP:
+            self.temp_integral_map = np.zeros(celsius_frame.shape, dtype=np.float32)
+            self.scratch = np.empty(celsius_frame.shape, dtype=np.float32)
+        self.current_burn_mask = np.zeros(celsius_frame.shape, dtype=np.uint8)
+        # cm² footprint of each ROI-window pixel; areas are weighted sums over it
+        self.area_weights = np.ascontiguousarray(self.roi.crop(geometry.pixel_area_map()))
+        self.roi_area_cm2 = float(np.sum(self.area_weights, where=self.roi.mask) if self.roi.mask is not None
+                                  else np.sum(self.area_weights))
+        self.detect_buffer = np.zeros(celsius_frame.shape, dtype=np.uint8)
+        self.detector = detectors.select(raw_frame)
+        if config.EDGE_DETECTION_METHOD == "otsu":
+            self.otsu = detectors.select_otsu(raw_frame if self.roi.mask is None else raw_frame[self.roi.mask])
+        self.temporal_filter = temporal_filter.make_filter(self.temporal_filter_kind, raw_frame.shape)
+        if config.FIRE_FRONT_TRACKING:
+            self.fire_front = FireFrontTracker(self.roi)
+        if self.sensitivity_deltas:
+            self.sensitivity_band_map = np.zeros(celsius_frame.shape, dtype=np.uint8)
+        if self.active_regions:
+            self.region_tracker = ActiveRegionTracker(celsius_frame.shape)
+        if self.roi.labels is not None:
+            n = self.roi.num_samples
+            self.sample_area_cm2 = np.bincount(self.roi.labels.reshape(-1), weights=self.area_weights.reshape(-1),
+                                               minlength=n + 1)[1:]
+            self.sample_cumulative_pixels = np.zeros(n, dtype=np.int64)
+            self.sample_cumulative_area = np.zeros(n)
+            self.sample_ignition_time = [None] * n
+            self.sample_zero_streak = np.zeros(n, dtype=np.int64)
+            self.sample_stop_time = [None] * n
+            self.sample_ros_estimator = WindowedRosEstimator(config.ROS_WINDOW_FRAMES)
         print(f"[Analyzer] Baseline: {self.baseline_temp:.1f}°C")
     
-    def _detect_burn_temperature_based(self, celsius_frame):
-        relative_threshold = self.baseline_temp + self.temp_threshold_delta
-        effective_threshold = max(relative_threshold, config.MIN_BURN_TEMP_ABSOLUTE)
-        return (celsius_frame > effective_threshold).astype(np.uint8) * 255
+    def _update_rolling_baseline(self, raw_frame):
+        """Feed unburned ROI pixels to the rolling histogram, True if the baseline moved.
+        
+        Runs after detection so pixels igniting on this frame are already
+        excluded; once everything has burned the last baseline is kept.
+        """
+        unburned = (self.cumulative_burn_mask == 0) & ~self.burning
+        if self.roi.mask is not None:
+            unburned &= self.roi.mask
+        self.rolling_baseline.update(raw_frame[unburned])
+        
+        baseline = self.rolling_baseline.percentile_celsius()
+        if baseline is None or baseline == self.baseline_temp:
+            return False
+        self.baseline_temp = baseline
+        return True
     
-    def _detect_burn_otsu(self, celsius_frame):
-        frame_uint8 = utils.normalize_to_uint8(celsius_frame)
-        _, thresh = cv2.threshold(frame_uint8, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        return thresh
+    def burn_threshold(self):
+        """Effective burn threshold in °C for the current baseline."""
+        if self.baseline_temp is None:
+            return 0
+        return max(self.baseline_temp + self.temp_threshold_delta, config.MIN_BURN_TEMP_ABSOLUTE)
     
     def _filter_small_regions(self, burn_mask):
         num_labels, labels = cv2.connectedComponents(burn_mask)
@@ -57,42 +221,222 @@ class BurnAnalyzer:
                 refined_mask[component_mask] = 255
         return refined_mask
     
-    def process_frame(self, file_path, frame_time=None):
-        raw_data, celsius_data = utils.read_gray_file(file_path)
+    def _learn_bad_pixels(self, raw_data):
+        """Collect ambient frames until the bad-pixel map can be learned and cached."""
+        if self.baseline_temp is not None:
+            # A few stuck-hot pixels are what we are learning; more means the fire is lit
+            hot = np.count_nonzero(raw_data > detectors.raw_threshold(self.burn_threshold()))
+            if hot >= config.WATCH_HOT_PIXELS:
+                return
+        self.bad_pixel_frames.append(raw_data.copy())
+        if len(self.bad_pixel_frames) < config.BAD_PIXEL_LEARN_FRAMES:
+            return
+        
+        learned = bad_pixels.BadPixelMap.learn(self.bad_pixel_frames)
+        learned.save(bad_pixels.cache_path())
+        self.bad_pixel_map = learned
+        self.bad_pixel_frames = None
+        print(f"[Analyzer] Learned {len(learned)} bad pixels for {config.CAMERA_ID}")
+    
+    def _watch(self, raw_data, frame_time, trace_id):
+        """Pre-ignition check on raw values only; True once a hotspot appears."""
+        threshold_c = self.burn_threshold()
+        if self.sensitivity_deltas:
+            # Hot for the most sensitive sweep threshold too, so no band misses frames
+            threshold_c = min(threshold_c, max(self.baseline_temp + self.sensitivity_deltas[0], config.MIN_BURN_TEMP_ABSOLUTE))
+        
+        roi_raw = self.roi.crop(raw_data)
+        hot = self.detector(roi_raw, self.detect_buffer, detectors.raw_threshold(threshold_c))
+        hot = hot > 0 if self.roi.mask is None else (hot > 0) & self.roi.mask
+        self.watch_hot_pixels = int(np.count_nonzero(hot))
+        self.watch_max_raw = int(roi_raw.max())
+        hot_area = float(np.sum(self.area_weights, where=hot))
+        self.last_elapsed = self._elapsed(frame_time, self.frames_received)
+        self._check_fps(frame_time, self.frames_received, self.last_elapsed)
+        self.watch_ros = float(self.watch_ros_estimator.update(self.last_elapsed, hot_area))
+        
+        if self.watch_hot_pixels < config.WATCH_HOT_PIXELS:
+            self.watch_ring.append((raw_data, frame_time, trace_id, self.frames_received))
+            self.frames_received += 1
+            self.watched_frames += 1
+            return False
+        
+        self.watching = False
+        self.watch_ros_until = self.frames_received + config.ROS_WINDOW_FRAMES
+        log.info("hotspot detected, full analysis engaged", extra={"trace": trace_id, "fields": {
+            "hot_pixels": self.watch_hot_pixels, "watched_frames": self.watched_frames,
+            "replayed": len(self.watch_ring)}})
+        return True
+    
+    def _replay_watch_ring(self):
+        """End of the watch: catch the full pipeline up on the frames leading to it (lock held)."""
+        self.watching = False
+        for ring_raw, ring_time, ring_trace, ring_index in self.watch_ring:
+            self._analyze(ring_raw, utils.raw_to_celsius(ring_raw), ring_time, ring_trace, ring_index)
+        self.watch_ring.clear()
+    
+    def _threshold_raw(self, raw_frame):
+        """Raw detection threshold for the configured method (pixels above it burn)."""
+        if config.EDGE_DETECTION_METHOD == "otsu":
+            # Two-class split straight on raw values, histogram limited to the ROI
+            return self.otsu(raw_frame if self.roi.mask is None else raw_frame[self.roi.mask])
+        return detectors.raw_threshold(self.burn_threshold())
+    
+    def process_frame(self, file_path, frame_time=None, trace_id=None):
+        written_at = utils.get_timestamp_from_file(file_path)
+        
+        t0 = time.perf_counter()
+        raw_data = utils.read_raw_gray(file_path)
+        metrics.STAGE_SECONDS.labels("read").observe(time.perf_counter() - t0)
+        
+        frame_result = self.analyze_raw(raw_data, frame_time, utils.extract_frame_number(file_path), trace_id)
+        
+        metrics.FRAMES_PROCESSED.inc()
+        metrics.FRAME_LATENCY_SECONDS.observe(max(0.0, time.time() - written_at))
+        return frame_result
+    
+    def analyze_raw(self, raw_data, frame_time=None, source_frame=-1, trace_id=None):
+        """Analyze an already-decoded raw frame (live file or recorded session array).
         
+        Returns None for a repeat of the previous frame's content, which only
+        advances the time base.
+        """
+        fingerprint = zlib.crc32(raw_data) if config.SKIP_DUPLICATE_FRAMES else None
+        bad_pixel_map = self.bad_pixel_map
+        if bad_pixel_map is not None:
+            if not raw_data.flags.writeable:
+                raw_data = raw_data.copy()
+            bad_pixel_map.correct(raw_data)
+        
+        with self.lock:
+            self._track_sequence(source_frame)
+            if fingerprint is not None and fingerprint == self.last_fingerprint:
+                self.frames_received += 1
+                self.duplicate_frames += 1
+                metrics.FRAMES_DUPLICATE.inc()
+                return None
+            self.last_fingerprint = fingerprint
+            if self.bad_pixel_frames is not None:
+                self._learn_bad_pixels(raw_data)
+            
+            if self.watching and self.baseline_temp is not None:
+                if not self._watch(raw_data, frame_time, trace_id):
+                    return None
+                self._replay_watch_ring()
+        
+        t0 = time.perf_counter()
+        celsius_data = utils.raw_to_celsius(raw_data)
+        metrics.STAGE_SECONDS.labels("convert").observe(time.perf_counter() - t0)
+        
+        # Decoding runs in parallel across workers, accumulation is serialized
+        with self.lock:
+            frame_index = self.frames_received
+            self.frames_received += 1
+            return self._analyze(raw_data, celsius_data, frame_time, trace_id, frame_index)
+    
+    def _track_sequence(self, source_frame):
+        """Count capture numbering gaps and frames arriving after a later one."""
+        if source_frame < 0:
+            return
+        if self.last_source_frame is not None:
+            if source_frame < self.last_source_frame:
+                self.out_of_order_frames += 1
+                metrics.FRAMES_OUT_OF_ORDER.inc()
+                return
+            gap = source_frame - self.last_source_frame - 1
+            if gap > 0:
+                self.dropped_frames += gap
+                metrics.FRAMES_DROPPED.inc(gap)
+        self.last_source_frame = source_frame
+    
+    def _elapsed(self, frame_time, frame_index):
+        """Seconds since the first frame, from capture times or else the frame index."""
         if frame_time is None:
-            elapsed_time = self.frame_count / config.DEFAULT_CAPTURE_FPS
-        else:
-            if self.first_frame_time is None:
-                self.first_frame_time = frame_time
-            elapsed_time = frame_time - self.first_frame_time
+            return frame_index / config.DEFAULT_CAPTURE_FPS
+        if self.first_frame_time is None:
+            self.first_frame_time = frame_time
+        return frame_time - self.first_frame_time
+    
+    def _check_fps(self, frame_time, frame_index, elapsed_time):
+        """Measure the capture rate once, over the first 50 received frames (watched and duplicates too)."""
+        if frame_time is None or self.actual_fps is not None or frame_index < 50 or elapsed_time <= 0:
+            return
+        self.actual_fps = frame_index / elapsed_time
+        if abs(self.actual_fps - config.DEFAULT_CAPTURE_FPS) > 1:
+            print(f"[Analyzer] WARNING: FPS {self.actual_fps:.1f} != {config.DEFAULT_CAPTURE_FPS}")
+    
+    def _analyze(self, raw_data, celsius_data, frame_time=None, trace_id=None, frame_index=None):
+        frame_index = self.frame_count if frame_index is None else frame_index
+        elapsed_time = self._elapsed(frame_time, frame_index)
+        self.last_elapsed = max(self.last_elapsed, elapsed_time)
+        
+        if self.roi is None:
+            self.roi = resolve_roi(celsius_data)
+            print(f"[Analyzer] ROI: {self.roi.pixel_count} px in {self.roi.crop_shape[1]}×{self.roi.crop_shape[0]} window")
+        raw_data = self.roi.crop(raw_data)
+        celsius_data = self.roi.crop(celsius_data)
         
         if self.baseline_temp is None:
-            self._establish_baseline(celsius_data)
+            self._establish_baseline(celsius_data, raw_data)
         
-        if config.EDGE_DETECTION_METHOD == "temperature":
-            current_burn_mask = self._detect_burn_temperature_based(celsius_data)
-        else:
-            current_burn_mask = self._detect_burn_otsu(celsius_data)
+        t0 = time.perf_counter()
+        detect_raw = raw_data
+        if self.temporal_filter is not None:
+            # Filter state covers the whole ROI every frame, detection may still use a window
+            detect_raw = self.temporal_filter.apply(raw_data)
+        
+        # Active-region mode re-evaluates only tiles near the front, the rest keep last frame's mask;
+        # tiles are picked from the frame detection sees, so a filtered value still rising stays active
+        window = None
+        if self.region_tracker is not None:
+            track_celsius = celsius_data if detect_raw is raw_data else utils.raw_to_celsius(detect_raw)
+            window = self.region_tracker.window(track_celsius, self.current_burn_mask)
+        if window is None:
+            window = (slice(None), slice(None))
+        window_mask = self.detect_buffer[window]
+        if window_mask.size:
+            self.detector(detect_raw[window], window_mask, self._threshold_raw(detect_raw))
+        t1 = time.perf_counter()
+        
+        if self.roi.mask is not None:
+            window_mask[~self.roi.mask[window]] = 0
+        if window_mask.size:
+            window_mask = self._filter_small_regions(window_mask)
+        self.current_burn_mask[window] = window_mask
+        current_burn_mask = self.current_burn_mask
+        np.greater(current_burn_mask, 0, out=self.burning)
+        t2 = time.perf_counter()
         
-        current_burn_mask = self._filter_small_regions(current_burn_mask)
-        self.cumulative_burn_mask[current_burn_mask > 0] = 255
+        time_step = elapsed_time - self.frame_data[-1]['elapsed_sec'] if self.frame_data else 0.0
+        self._update_severity_maps(raw_data, celsius_data, time_step)
         
-        current_burn_pixels = np.sum(current_burn_mask > 0)
-        cumulative_burn_pixels = np.sum(self.cumulative_burn_mask > 0)
+        # Only pixels burning for the first time touch the cumulative state
+        # (new burns can only appear inside the evaluated window)
+        new_rows, new_cols = np.nonzero((window_mask > 0) & (self.cumulative_burn_mask[window] == 0))
+        new_rows += window[0].start or 0
+        new_cols += window[1].start or 0
+        new_pixels = np.ravel_multi_index((new_rows, new_cols), self.cumulative_burn_mask.shape)
+        self.cumulative_burn_mask.reshape(-1)[new_pixels] = 255
+        self.arrival_time_map.reshape(-1)[new_pixels] = elapsed_time
+        self.cumulative_burn_pixels += new_pixels.size
+        self.cumulative_burn_area += float(self.area_weights.reshape(-1)[new_pixels].sum())
+        cumulative_burn_pixels = self.cumulative_burn_pixels
         
-        current_burn_area_cm2 = utils.pixels_to_cm2(current_burn_pixels)
-        cumulative_burn_area_cm2 = utils.pixels_to_cm2(cumulative_burn_pixels)
+        current_burn_area_cm2 = float(np.sum(self.area_weights, where=self.burning))
+        cumulative_burn_area_cm2 = self.cumulative_burn_area
         
-        total_pixels = config.IMAGE_WIDTH * config.IMAGE_HEIGHT
-        burn_percentage = (cumulative_burn_pixels / total_pixels) * 100
+        burn_percentage = (cumulative_burn_area_cm2 / self.roi_area_cm2) * 100
         
-        max_temp = np.max(celsius_data)
-        mean_temp = np.mean(celsius_data)
+        max_temp = np.max(celsius_data, where=self.roi.mask, initial=-np.inf) if self.roi.mask is not None else np.max(celsius_data)
+        mean_temp = np.mean(celsius_data, where=self.roi.mask) if self.roi.mask is not None else np.mean(celsius_data)
         
-        if self.ignition_frame is None and cumulative_burn_pixels > 50:
-            self.ignition_frame = self.frame_count
+        if self.ignition_frame is None and cumulative_burn_pixels > config.IGNITION_MIN_PIXELS:
+            self.ignition_frame = frame_index
             self.ignition_time = elapsed_time
+        # Origin from the first real burn, also when FORCE declared ignition earlier
+        if (self.fire_front is not None and self.fire_front.origin is None
+                and cumulative_burn_pixels > config.IGNITION_MIN_PIXELS):
+            self.fire_front.set_origin(self.cumulative_burn_mask)
         
         ros_cm2_per_sec = 0
         if len(self.frame_data) > 0:
@@ -101,9 +445,11 @@ class BurnAnalyzer:
             area_diff = cumulative_burn_area_cm2 - prev_frame['cumulative_burn_area_cm2']
             if time_diff > 0:
                 ros_cm2_per_sec = area_diff / time_diff
+        ros_windowed = float(self.ros_estimator.update(elapsed_time, cumulative_burn_area_cm2))
         
         frame_result = {
             'frame_number': self.frame_count,
+            'frame_index': frame_index,
             'timestamp': frame_time,
             'elapsed_sec': elapsed_time,
             'current_burn_area_cm2': current_burn_area_cm2,
@@ -112,41 +458,234 @@ class BurnAnalyzer:
             'max_temp_celsius': max_temp,
             'mean_temp_celsius': mean_temp,
             'ros_instantaneous_cm2_per_sec': ros_cm2_per_sec,
+            'ros_windowed_cm2_per_sec': ros_windowed,
+            'baseline_temp_celsius': self.baseline_temp,
+            'burn_threshold_celsius': self.burn_threshold(),
+            'baseline_updated': False,
+            'trace_id': trace_id,
         }
+        if self.roi.labels is not None:
+            frame_result['samples'] = self._update_samples(new_pixels, current_burn_mask, elapsed_time)
+        if self.sensitivity_band_map is not None:
+            frame_result['sensitivity_areas_cm2'] = self._update_sensitivity(celsius_data)
+        if self.fire_front is not None:
+            frame_result.update(self.fire_front.update(self.cumulative_burn_mask, new_pixels, elapsed_time))
+        # After detection so this frame's burning pixels stay out of the ambient histogram;
+        # the new baseline applies from the next frame
+        if self.rolling_baseline is not None and self.frame_count > 0 and self.frame_count % config.BASELINE_UPDATE_EVERY == 0:
+            frame_result['baseline_updated'] = self._update_rolling_baseline(raw_data)
         
         self.frame_data.append(frame_result)
         self.frame_count += 1
+        
+        t3 = time.perf_counter()
+        metrics.STAGE_SECONDS.labels("threshold").observe(t1 - t0)
+        metrics.STAGE_SECONDS.labels("filter").observe(t2 - t1)
+        metrics.STAGE_SECONDS.labels("accumulate").observe(t3 - t2)
 
-        # === AUTO-STOP: Fire has stopped spreading ===
-        current_ros = frame_result['ros_instantaneous_cm2_per_sec']
-
-        if current_ros < self.ROS_STOP_THRESHOLD:
-            self.ros_zero_streak += 1
-        else:
-            self.ros_zero_streak = 0  # reset if any activity
-
-        # Fire has been dead for 50+ frames AND ignition actually happened
-        if (current_ros < self.ROS_STOP_THRESHOLD and importlib.import_module("main").FIRE_IS_ACTIVE):
-
-            print(f"[Analyzer] Fire stopped! ROS < {self.ROS_STOP_THRESHOLD} for {self.ros_zero_streak} frames")
-            self.has_auto_stopped = True
-
-            # Trigger auto-stop (this runs in worker thread → use thread-safe call)
-            threading.Thread(target=self.auto_stop_callback, daemon=True).start()
-
+        if fire_log.sampled("analyzer.frame"):
+            log.debug("frame accumulated", extra={"trace": trace_id, "fields": {
+                "frame": frame_result['frame_number'],
+                "area_cm2": round(cumulative_burn_area_cm2, 2),
+                "ros": round(ros_cm2_per_sec, 3),
+            }})
 
+        self.auto_stop.update(ros_windowed, elapsed_time, self.all_samples_stopped(), trace_id)
+        
+        self._check_fps(frame_time, frame_index, elapsed_time)
         
-        if frame_time is not None and self.frame_count == 50:
-            self.actual_fps = 50 / elapsed_time
-            if abs(self.actual_fps - config.DEFAULT_CAPTURE_FPS) > 1:
-                print(f"[Analyzer] WARNING: FPS {self.actual_fps:.1f} != {config.DEFAULT_CAPTURE_FPS}")
+        # Last, so listeners see the frame's state fully updated
+        for listener in self.frame_listeners:
+            listener(frame_result, celsius_data, self.cumulative_burn_mask)
         
         return frame_result
     
+    def _update_severity_maps(self, raw_frame, celsius_frame, time_step):
+        """Per-pixel peak, time above threshold and (optionally) °C·s integral, without allocating."""
+        np.maximum(self.peak_raw_map, raw_frame, out=self.peak_raw_map)
+        if time_step <= 0:
+            return
+        np.add(self.residence_time_map, time_step, out=self.residence_time_map, where=self.burning)
+        if self.temp_integral_map is not None:
+            np.subtract(celsius_frame, self.baseline_temp, out=self.scratch)
+            self.scratch *= time_step
+            np.add(self.temp_integral_map, self.scratch, out=self.temp_integral_map, where=self.burning)
+    
+    def _update_samples(self, new_pixels, current_burn_mask, elapsed_time):
+        """Per-sample areas, ROS, ignition and stop in one bincount pass over the label map."""
+        n = self.roi.num_samples
+        labels = self.roi.labels.reshape(-1)
+        weights = self.area_weights.reshape(-1)
+        burning = np.flatnonzero(current_burn_mask)
+        self.sample_cumulative_pixels += np.bincount(labels[new_pixels], minlength=n + 1)[1:]
+        self.sample_cumulative_area += np.bincount(labels[new_pixels], weights=weights[new_pixels], minlength=n + 1)[1:]
+        current_area = np.bincount(labels[burning], weights=weights[burning], minlength=n + 1)[1:]
+        
+        cumulative_area = self.sample_cumulative_area
+        ros = np.zeros(n)
+        if self.frame_data:
+            prev = self.frame_data[-1]
+            time_diff = elapsed_time - prev['elapsed_sec']
+            if time_diff > 0:
+                prev_area = np.array([s['cumulative_burn_area_cm2'] for s in prev['samples']])
+                ros = (cumulative_area - prev_area) / time_diff
+        # Copy: sample_cumulative_area is updated in place
+        windowed = self.sample_ros_estimator.update(elapsed_time, cumulative_area.copy())
+        
+        samples = []
+        for i in range(n):
+            if self.sample_ignition_time[i] is None and self.sample_cumulative_pixels[i] > config.IGNITION_MIN_PIXELS:
+                self.sample_ignition_time[i] = elapsed_time
+            
+            # A sample is done once it has burned and stayed below the ROS threshold long enough
+            if self.sample_ignition_time[i] is not None and self.sample_stop_time[i] is None:
+                self.sample_zero_streak[i] = self.sample_zero_streak[i] + 1 if windowed[i] < self.ROS_STOP_THRESHOLD else 0
+                if self.sample_zero_streak[i] >= self.MIN_ZERO_FRAMES:
+                    self.sample_stop_time[i] = elapsed_time
+                    print(f"[Analyzer] Sample {i + 1} stopped spreading at {elapsed_time:.1f}s")
+            
+            samples.append({
+                'sample': i + 1,
+                'current_burn_area_cm2': float(current_area[i]),
+                'cumulative_burn_area_cm2': float(cumulative_area[i]),
+                'burn_percentage': float(cumulative_area[i] / self.sample_area_cm2[i] * 100),
+                'ros_instantaneous_cm2_per_sec': float(ros[i]),
+                'ros_windowed_cm2_per_sec': float(windowed[i]),
+            })
+        return samples
+    
+    def _update_sensitivity(self, celsius_frame):
+        """Cumulative burn area for every SENSITIVITY_DELTAS threshold from one band map."""
+        thresholds = np.array([max(self.baseline_temp + d, config.MIN_BURN_TEMP_ABSOLUTE)
+                               for d in self.sensitivity_deltas], dtype=np.float32)
+        # band k = number of thresholds the pixel exceeds
+        band = np.searchsorted(thresholds, celsius_frame, side='left').astype(np.uint8)
+        if self.roi.mask is not None:
+            band[~self.roi.mask] = 0
+        np.maximum(self.sensitivity_band_map, band, out=self.sensitivity_band_map)
+        
+        areas = np.bincount(self.sensitivity_band_map.reshape(-1), weights=self.area_weights.reshape(-1),
+                            minlength=len(thresholds) + 1)
+        # Pixels at band >= k burned at threshold k
+        at_least = np.cumsum(areas[::-1])[::-1][1:]
+        return [float(a) for a in at_least]
+    
+    def _sensitivity_summary(self):
+        if self.sensitivity_band_map is None or not self.frame_data:
+            return []
+        curves = np.array([f['sensitivity_areas_cm2'] for f in self.frame_data])
+        times = np.array([f['elapsed_sec'] for f in self.frame_data])
+        dt = np.diff(times)
+        max_ros = np.zeros(len(self.sensitivity_deltas))
+        if len(dt):
+            valid = dt > 0
+            ros = np.diff(curves, axis=0)[valid] / dt[valid][:, None]
+            if len(ros):
+                max_ros = ros.max(axis=0)
+        return [{
+            'delta_celsius': delta,
+            'threshold_celsius': float(max(self.baseline_temp + delta, config.MIN_BURN_TEMP_ABSOLUTE)),
+            'final_burn_area_cm2': float(curves[-1, k]),
+            'max_ros_cm2_per_sec': float(max_ros[k]),
+        } for k, delta in enumerate(self.sensitivity_deltas)]
+    
+    @property
+    def fire_active(self):
+        """True once the fire has been confirmed lit (FIRESTATUS or FORCE) for this run."""
+        return self.auto_stop.fire_active
+    
+    def check_fire_lit(self):
+        """FIRESTATUS: is the fire spreading right now? A yes arms auto-stop."""
+        with self.lock:
+            if not self.frame_data:
+                return False
+            frame = self.frame_data[-1]
+            ros = frame['ros_windowed_cm2_per_sec']
+            if frame['frame_index'] < self.watch_ros_until:
+                ros = max(ros, self.watch_ros)
+            lit = ros > config.FIRE_LIT_FIRESTATUS
+            if lit:
+                self.auto_stop.arm(frame['elapsed_sec'])
+            return lit
+    
+    def force_ignition(self):
+        """FORCE: treat the fire as lit from the latest received frame on."""
+        with self.lock:
+            if self.watching and self.baseline_temp is not None:
+                # Auto-stop only runs on fully analyzed frames, so the watch ends here
+                log.info("watch ended by FORCE", extra={"fields": {
+                    "watched_frames": self.watched_frames, "replayed": len(self.watch_ring)}})
+                self._replay_watch_ring()
+            elapsed = self.last_elapsed
+            if self.ignition_frame is None:
+                self.ignition_frame = max(self.frames_received - 1, 0)
+                self.ignition_time = elapsed
+            self.auto_stop.arm(elapsed)
+    
+    def all_samples_stopped(self):
+        """True once every ignited sample has stopped spreading (multi-sample only)."""
+        if self.sample_stop_time is None:
+            return False
+        ignited = [i for i, t in enumerate(self.sample_ignition_time) if t is not None]
+        return bool(ignited) and all(self.sample_stop_time[i] is not None for i in ignited)
+    
+    def _sample_summaries(self):
+        if self.sample_cumulative_pixels is None or not self.frame_data:
+            return []
+        last = self.frame_data[-1]
+        summaries = []
+        for i, sample in enumerate(last['samples']):
+            ros_values = [f['samples'][i]['ros_instantaneous_cm2_per_sec'] for f in self.frame_data[1:]
+                          if f['samples'][i]['ros_instantaneous_cm2_per_sec'] > 0]
+            summaries.append({
+                'sample': i + 1,
+                'final_burn_area_cm2': sample['cumulative_burn_area_cm2'],
+                'final_burn_percentage': sample['burn_percentage'],
+                'avg_ros_cm2_per_sec': sample['cumulative_burn_area_cm2'] / last['elapsed_sec'] if last['elapsed_sec'] > 0 else 0,
+                'max_ros_cm2_per_sec': max(ros_values) if ros_values else 0,
+                'ignition_time_sec': self.sample_ignition_time[i],
+                'stop_time_sec': self.sample_stop_time[i],
+            })
+        return summaries
+    
+    def snapshot_state(self):
+        """Pickled copy of the accumulated state, for checkpoint.py.
+        
+        Call with self.lock held (frame listeners are) so it matches one frame.
+        """
+        state = {k: v for k, v in vars(self).items() if k not in self._SNAPSHOT_SKIP}
+        for name in self._SNAPSHOT_PACKED:
+            mask = state[name]
+            if mask is not None:
+                state[name] = (mask.shape, np.packbits(mask > 0))
+        state['auto_stop'] = (self.auto_stop.state, self.auto_stop.zero_streak, self.auto_stop.stop_time)
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def restore_state(self, snapshot, frame_data):
+        """Continue from a snapshot_state() and the frame results it covers."""
+        state = pickle.loads(snapshot)
+        for name in self._SNAPSHOT_PACKED:
+            if state[name] is not None:
+                shape, packed = state[name]
+                state[name] = np.unpackbits(packed, count=int(np.prod(shape))).reshape(shape) * np.uint8(255)
+        auto_state = state.pop('auto_stop')
+        with self.lock:
+            vars(self).update(state)
+            self.auto_stop.state, self.auto_stop.zero_streak, self.auto_stop.stop_time = auto_state
+            self.frame_data = list(frame_data)
+            if self.cumulative_burn_mask is not None:
+                shape = self.cumulative_burn_mask.shape
+                self.area_weights = np.ascontiguousarray(self.roi.crop(geometry.pixel_area_map()))
+                self.burning = np.greater(self.current_burn_mask, 0)
+                self.detect_buffer = np.zeros(shape, dtype=np.uint8)
+                if self.temp_integral_map is not None:
+                    self.scratch = np.empty(shape, dtype=np.float32)
+    
     def get_summary_statistics(self):
         if not self.frame_data:
             return {
                 'total_frames': 0,
+                'received_frames': self.frames_received,
                 'duration_sec': 0,
                 'final_burn_area_cm2': 0,
                 'final_burn_percentage': 0,
@@ -156,9 +695,20 @@ class BurnAnalyzer:
                 'max_temp_celsius': 0,
                 'ignition_frame': None,
                 'ignition_time_sec': None,
+                'auto_stop_time_sec': None,
                 'baseline_temp_celsius': None,
                 'burn_threshold_celsius': 0,
+                'linear_ros_cm_per_sec': 0,
+                'max_head_ros_cm_per_sec': 0,
+                'mean_head_ros_cm_per_sec': 0,
+                'max_front_length_cm': 0,
                 'actual_fps': None,
+                'dropped_frames': 0,
+                'out_of_order_frames': 0,
+                'duplicate_frames': 0,
+                'watched_frames': self.watched_frames,
+                'samples': [],
+                'sensitivity': [],
             }
         
         last_frame = self.frame_data[-1]
@@ -168,9 +718,11 @@ class BurnAnalyzer:
         max_ros = max(ros_values) if ros_values else 0
         mean_instantaneous_ros = np.mean(ros_values) if ros_values else 0
         max_temp = max(f['max_temp_celsius'] for f in self.frame_data)
+        head_ros = [f['head_ros_cm_per_sec'] for f in self.frame_data if f.get('head_ros_cm_per_sec', 0) > 0]
         
         return {
             'total_frames': self.frame_count,
+            'received_frames': self.frames_received,
             'duration_sec': last_frame['elapsed_sec'],
             'final_burn_area_cm2': last_frame['cumulative_burn_area_cm2'],
             'final_burn_percentage': last_frame['burn_percentage'],
@@ -180,11 +732,56 @@ class BurnAnalyzer:
             'max_temp_celsius': max_temp,
             'ignition_frame': self.ignition_frame,
             'ignition_time_sec': self.ignition_time,
+            'auto_stop_time_sec': self.auto_stop.stop_time,
             'baseline_temp_celsius': self.baseline_temp,
-            'burn_threshold_celsius': max(self.baseline_temp + self.temp_threshold_delta, config.MIN_BURN_TEMP_ABSOLUTE) if self.baseline_temp else 0,
+            'burn_threshold_celsius': self.burn_threshold(),
+            'linear_ros_cm_per_sec': arrival_map.linear_spread_rate(self.arrival_time_map,
+                                                                    positions=self.pixel_positions()),
+            'max_head_ros_cm_per_sec': max(head_ros) if head_ros else 0,
+            'mean_head_ros_cm_per_sec': float(np.mean(head_ros)) if head_ros else 0,
+            'max_front_length_cm': max((f.get('front_length_cm', 0) for f in self.frame_data), default=0),
             'actual_fps': self.actual_fps,
+            'dropped_frames': self.dropped_frames,
+            'out_of_order_frames': self.out_of_order_frames,
+            'duplicate_frames': self.duplicate_frames,
+            'watched_frames': self.watched_frames,
+            'samples': self._sample_summaries(),
+            'sensitivity': self._sensitivity_summary(),
         }
     
+    def pixel_positions(self):
+        """(x_cm, y_cm) sample-plane centres of the ROI-window pixels, matching arrival_time_map."""
+        if self.roi is None:
+            return None
+        x, y = geometry.pixel_centres()
+        return self.roi.crop(x), self.roi.crop(y)
+    
+    def export_maps(self, path=None):
+        """Save full-frame per-pixel maps as a compressed .npz.
+        
+        Peak temperature is uint16 raw (Kelvin × 100, see utils.raw_to_celsius),
+        residence time uint16 deciseconds; 0 outside the ROI.
+        """
+        if self.arrival_time_map is None:
+            return None
+        path = path or config.MAPS_FILE
+        outside = ~self.roi.full_mask()
+        peak_raw = self.roi.paste(self.peak_raw_map)
+        peak_raw[outside] = 0
+        residence_ds = self.roi.paste(np.minimum(np.rint(self.residence_time_map * 10), 65535).astype(np.uint16))
+        residence_ds[outside] = 0
+        maps = {
+            'arrival_time_sec': self.roi.paste(self.arrival_time_map, np.nan),
+            'peak_temp_raw': peak_raw,
+            'residence_time_ds': residence_ds,
+            'pixel_area_cm2': geometry.pixel_area_map(),
+            'roi_mask': ~outside,
+        }
+        if self.temp_integral_map is not None:
+            maps['temp_integral_c_sec'] = self.roi.paste(self.temp_integral_map)
+        np.savez_compressed(path, **maps)
+        return path
+    
     def get_live_update(self, frame_number=None):
         if not self.frame_data:
             return {'status': 'waiting', 'frame': 0}
@@ -193,7 +790,7 @@ class BurnAnalyzer:
             frame_number = len(self.frame_data) - 1
         
         frame = self.frame_data[frame_number]
-        return {
+        update = {
             'status': 'capturing',
             'frame': frame['frame_number'],
             'elapsed_sec': frame['elapsed_sec'],
@@ -201,7 +798,26 @@ class BurnAnalyzer:
             'burn_area_cm2': round(frame['cumulative_burn_area_cm2'], 2),
             'max_temp_celsius': round(frame['max_temp_celsius'], 1),
             'current_ros_cm2_per_sec': round(frame['ros_instantaneous_cm2_per_sec'], 2),
+            'windowed_ros_cm2_per_sec': round(frame['ros_windowed_cm2_per_sec'], 2),
+            'fire_state': self.auto_stop.state,
         }
+        if 'head_ros_cm_per_sec' in frame:
+            update['head_ros_cm_per_sec'] = round(frame['head_ros_cm_per_sec'], 2)
+        for sample in frame.get('samples', []):
+            n = sample['sample']
+            update[f's{n}_burn_percentage'] = round(sample['burn_percentage'], 2)
+            update[f's{n}_burn_area_cm2'] = round(sample['cumulative_burn_area_cm2'], 2)
+            update[f's{n}_current_ros_cm2_per_sec'] = round(sample['ros_instantaneous_cm2_per_sec'], 2)
+        if self.watching and self.watched_frames:
+            # frame_data stops at the baseline frame while watching: report the watch itself
+            update['status'] = 'watching'
+            update['frame'] = self.frames_received - 1
+            update['elapsed_sec'] = round(self.last_elapsed, 2)
+            update['max_temp_celsius'] = round(float(utils.raw_to_celsius(np.uint16(self.watch_max_raw))), 1)
+            update['hot_pixels'] = self.watch_hot_pixels
+            update['watched_frames'] = self.watched_frames
+            update['windowed_ros_cm2_per_sec'] = round(self.watch_ros, 2)
+        return update
     
     def print_summary(self):
         summary = self.get_summary_statistics()
@@ -215,12 +831,29 @@ class BurnAnalyzer:
             return
         
         print(f"Duration: {utils.format_duration(summary['duration_sec'])}")
-        print(f"Total frames: {summary['total_frames']}")
+        print(f"Total frames: {summary['total_frames']} analyzed of {summary['received_frames']} received")
+        if summary['watched_frames']:
+            print(f"Watched before ignition: {summary['watched_frames']}")
+        if summary['duplicate_frames']:
+            print(f"Duplicate frames skipped: {summary['duplicate_frames']}")
         print(f"Final burn area: {summary['final_burn_area_cm2']:.2f} cm² ({summary['final_burn_percentage']:.1f}%)")
         print(f"Average ROS: {summary['avg_ros_cm2_per_sec']:.2f} cm²/sec")
         print(f"Peak ROS: {summary['max_ros_cm2_per_sec']:.2f} cm²/sec")
+        if summary['max_head_ros_cm_per_sec']:
+            print(f"Head-fire ROS: {summary['mean_head_ros_cm_per_sec']:.2f} cm/sec (peak {summary['max_head_ros_cm_per_sec']:.2f}), "
+                  f"max front length {summary['max_front_length_cm']:.1f} cm")
         print(f"Max temperature: {summary['max_temp_celsius']:.1f}°C")
         if summary['ignition_frame'] is not None:
             print(f"Ignition: frame {summary['ignition_frame']} ({summary['ignition_time_sec']:.1f}s)")
+        if summary['auto_stop_time_sec'] is not None:
+            print(f"Auto-stop: fire stopped spreading at {summary['auto_stop_time_sec']:.1f}s")
+        for sample in summary['samples']:
+            ignition = f"{sample['ignition_time_sec']:.1f}s" if sample['ignition_time_sec'] is not None else "none"
+            print(f"  Sample {sample['sample']}: {sample['final_burn_area_cm2']:.2f} cm² "
+                  f"({sample['final_burn_percentage']:.1f}%), avg ROS {sample['avg_ros_cm2_per_sec']:.2f}, "
+                  f"peak {sample['max_ros_cm2_per_sec']:.2f} cm²/sec, ignition {ignition}")
+        for point in summary['sensitivity']:
+            print(f"  Δ{point['delta_celsius']:>4}°C (>{point['threshold_celsius']:.0f}°C): "
+                  f"{point['final_burn_area_cm2']:.2f} cm², peak ROS {point['max_ros_cm2_per_sec']:.2f} cm²/sec")
         print(f"{'='*60}\n")
 
@@ -0,0 +1,228 @@
+# checkpoint.py
+# Crash-resume for long captures: append-only journal of per-frame results
+# plus periodic compact snapshots of the analyzer state
+#
+# journal.bin  records of <type u8, length u32, crc32 u32> + JSON payload;
+#              the first is the session (START parameters), then one per frame
+# snapshot.bin analyzer.snapshot_state() (zlib), with the journal offset and
+#              frame count it covers; replaced atomically
+#
+# A torn tail (crash mid-write) fails its crc and is cut off on load.
+
+import os
+import json
+import time
+import zlib
+import queue
+import struct
+import threading
+import config
+import utils
+import fire_log
+
+log = fire_log.get_logger("checkpoint")
+
+RECORD_HEADER = struct.Struct("<BII")
+RECORD_SESSION = 1
+RECORD_FRAME = 2
+
+SNAPSHOT_HEADER = struct.Struct("<4sQII")   # magic, journal offset, frame records, crc32
+SNAPSHOT_MAGIC = b"FCK1"
+
+JOURNAL_NAME = "journal.bin"
+SNAPSHOT_NAME = "snapshot.bin"
+
+
+def _encode(record_type, payload):
+    data = json.dumps(payload, separators=(",", ":"), default=float).encode("utf-8")
+    return RECORD_HEADER.pack(record_type, len(data), zlib.crc32(data)) + data
+
+
+def read_journal(path):
+    """[(type, payload, end_offset), ...] up to the first incomplete or corrupt record."""
+    records = []
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        record_type, length, crc = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        body = data[start:start + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            break
+        offset = start + length
+        records.append((record_type, json.loads(body), offset))
+    return records
+
+
+def read_snapshot(path):
+    """(journal_offset, frame_records, state_bytes), None if missing or corrupt."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < SNAPSHOT_HEADER.size:
+        return None
+    magic, offset, frame_records, crc = SNAPSHOT_HEADER.unpack_from(data)
+    body = data[SNAPSHOT_HEADER.size:]
+    if magic != SNAPSHOT_MAGIC or zlib.crc32(body) != crc:
+        return None
+    return offset, frame_records, zlib.decompress(body)
+
+
+class ResumePoint:
+    """What a crashed run left behind: START parameters, analyzer state and frame history."""
+
+    def __init__(self, session, state, frame_data, journal_offset):
+        self.session = session
+        self.state = state              # snapshot_state() bytes, None if no snapshot was taken
+        self.frame_data = frame_data    # journaled frame results covered by the snapshot
+        self.journal_offset = journal_offset
+
+
+class CheckpointJournal:
+    """Frame listener that journals results and snapshots the analyzer every CHECKPOINT_SNAPSHOT_FRAMES.
+
+    Encoding, writing and fsync happen on a writer thread; the frame worker
+    only queues the result (and, on snapshot frames, the pickled state).
+    """
+
+    def __init__(self, analyzer, directory=None, snapshot_frames=None, fsync_interval=None):
+        self.analyzer = analyzer
+        self.directory = directory or config.CHECKPOINT_DIR
+        self.snapshot_frames = snapshot_frames or config.CHECKPOINT_SNAPSHOT_FRAMES
+        self.fsync_interval = fsync_interval or config.CHECKPOINT_FSYNC_INTERVAL
+        self.journal_path = os.path.join(self.directory, JOURNAL_NAME)
+        self.snapshot_path = os.path.join(self.directory, SNAPSHOT_NAME)
+        utils.ensure_dir(self.directory)
+
+        self.active = False
+        self.frame_records = 0
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    # Producer side
+
+    def start(self, session):
+        """New run: drop any previous journal and record the START parameters."""
+        self.frame_records = 0
+        self.active = True
+        self.queue.put(("start", session))
+
+    def resume(self, point):
+        """Continue journaling a restored run after its last covered frame."""
+        self.frame_records = len(point.frame_data)
+        self.active = True
+        self.queue.put(("resume", point.journal_offset))
+
+    def finish(self):
+        """Run over (results saved, stopped or reset): nothing left to resume."""
+        self.active = False
+        self.queue.put(("finish", None))
+
+    def record_frame(self, frame_result, celsius_data=None, cumulative_burn_mask=None):
+        """Frame listener, called with the analyzer lock held so the snapshot is consistent."""
+        if not self.active:
+            return
+        self.queue.put(("frame", frame_result))
+        self.frame_records += 1
+        if self.frame_records % self.snapshot_frames == 0:
+            self.queue.put(("snapshot", (self.frame_records, self.analyzer.snapshot_state())))
+
+    def flush(self, timeout=None):
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def load(self):
+        """ResumePoint of an unfinished run, None if the last run finished cleanly."""
+        if not os.path.exists(self.journal_path):
+            return None
+        records = read_journal(self.journal_path)
+        if not records or records[0][0] != RECORD_SESSION:
+            return None
+        session, journal_offset = records[0][1], records[0][2]
+        frames = [payload for record_type, payload, _ in records[1:] if record_type == RECORD_FRAME]
+
+        state = None
+        snapshot = read_snapshot(self.snapshot_path)
+        if snapshot is not None and snapshot[1] <= len(frames):
+            journal_offset, covered, state = snapshot
+            frames = frames[:covered]
+        else:
+            frames = []
+        return ResumePoint(session, state, frames, journal_offset)
+
+    # Writer thread
+
+    def _writer(self):
+        journal = None
+        last_sync = time.monotonic()
+        while True:
+            try:
+                kind, payload = self.queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                kind, payload = None, None
+
+            if kind == "frame" and journal is not None:
+                journal.write(_encode(RECORD_FRAME, payload))
+            elif kind == "start":
+                if journal is not None:
+                    journal.close()
+                self._remove(self.snapshot_path)
+                journal = open(self.journal_path, "wb")
+                journal.write(_encode(RECORD_SESSION, payload))
+                self._sync(journal)
+                last_sync = time.monotonic()
+            elif kind == "resume":
+                if journal is not None:
+                    journal.close()
+                journal = open(self.journal_path, "r+b")
+                journal.truncate(payload)
+                journal.seek(payload)
+            elif kind == "snapshot" and journal is not None:
+                self._sync(journal)
+                last_sync = time.monotonic()
+                self._write_snapshot(journal.tell(), *payload)
+            elif kind == "finish":
+                if journal is not None:
+                    journal.close()
+                    journal = None
+                self._remove(self.journal_path)
+                self._remove(self.snapshot_path)
+            elif kind == "flush":
+                if journal is not None:
+                    self._sync(journal)
+                    last_sync = time.monotonic()
+                payload.set()
+
+            # Batched durability: at most one fsync per interval however many frames arrive
+            if journal is not None and time.monotonic() - last_sync >= self.fsync_interval:
+                self._sync(journal)
+                last_sync = time.monotonic()
+
+    @staticmethod
+    def _sync(journal):
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    def _write_snapshot(self, journal_offset, frame_records, state):
+        start = time.perf_counter()
+        body = zlib.compress(state, 1)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, journal_offset, frame_records, zlib.crc32(body)))
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        log.debug("snapshot", extra={"fields": {"frames": frame_records, "bytes": len(body),
+                                                "ms": round((time.perf_counter() - start) * 1000, 1)}})
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -9,6 +9,8 @@ FOV_DEGREES = 95
 MAX_TEMP_CELSIUS = 400
 CAMERA_DISTANCE_CM = 17.5
 
+CAMERA_ID = "lepton-1"       # keys per-camera calibration (bad-pixel map)
+
 # Calculated FOV
 FOV_WIDTH_CM = 2 * CAMERA_DISTANCE_CM * math.tan(math.radians(FOV_DEGREES / 2))
 FOV_HEIGHT_CM = FOV_WIDTH_CM * (IMAGE_HEIGHT / IMAGE_WIDTH)
@@ -16,12 +18,79 @@ PIXEL_AREA_CM2 = (FOV_WIDTH_CM * FOV_HEIGHT_CM) / (IMAGE_WIDTH * IMAGE_HEIGHT)
 PIXEL_WIDTH_MM = (FOV_WIDTH_CM * 10) / IMAGE_WIDTH
 PIXEL_HEIGHT_MM = (FOV_HEIGHT_CM * 10) / IMAGE_HEIGHT
 
+# Per-pixel area (geometry.pixel_area_map): "equidistant" (f-θ, wide-angle) or
+# "rectilinear" (pinhole, every pixel = PIXEL_AREA_CM2); distortion (k1, k2)
+# applied to the incidence angle θ·(1 + k1·θ² + k2·θ⁴)
+LENS_MODEL = "equidistant"
+LENS_DISTORTION = (0.0, 0.0)
+
 # Processing
 BURN_TEMP_DELTA = 100
 MIN_BURN_TEMP_ABSOLUTE = 80
 
+# Baseline: "fixed" = percentile of the first frame, "rolling" = windowed
+# histogram of unburned pixels refreshed every BASELINE_UPDATE_EVERY frames
+BASELINE_MODE = "fixed"
+BASELINE_WINDOW_UPDATES = 10  # histogram updates kept (10 × 9 frames = 90 frames, ~10 s)
+BASELINE_UPDATE_EVERY = 9
+BASELINE_HIST_SHIFT = 4     # raw values / 16 → 0.16 °C bins
+
+# Sensitivity sweep: extra BURN_TEMP_DELTA values evaluated in the same pass
+# (e.g. [60, 80, 100, 120, 150]); None disables. No small-region filtering.
+SENSITIVITY_DELTAS = None
+
 MIN_CONTOUR_AREA_PIXELS = 20
+IGNITION_MIN_PIXELS = 50
+
+# Bad-pixel correction: map learned from the first ambient frames (or
+# `python3 bad_pixels.py`), cached per CAMERA_ID, applied at ingest
+BAD_PIXEL_CORRECTION = True
+BAD_PIXEL_CACHE_DIR = os.path.expanduser("~/.fire_bad_pixels")
+BAD_PIXEL_LEARN_FRAMES = 9
+BAD_PIXEL_MAX_DEVIATION_C = 3.0   # beyond all but one of the 8 neighbours
+BAD_PIXEL_NOISE_FACTOR = 10       # temporal std vs the frame's median std
+
+# Fire front: per-frame front length, centroid velocity and head-fire linear
+# ROS (regression over the last FRONT_ROS_WINDOW frames)
+FIRE_FRONT_TRACKING = True
+FRONT_ROS_WINDOW = 9
+
+# Temporal denoising of the detection input: None, "ema" or "median3"
+# (recursive median of current, previous and last output)
+TEMPORAL_FILTER = None
+TEMPORAL_EMA_ALPHA = 0.5
+
+# Pre-ignition watch: until WATCH_HOT_PIXELS ROI pixels exceed the burn
+# threshold, frames only update max/hot-pixel counts (temperature detection);
+# the last WATCH_RING_SIZE frames are replayed when the full pipeline engages
+PRE_IGNITION_WATCH = True
+WATCH_HOT_PIXELS = 5
+WATCH_RING_SIZE = 18
 EDGE_DETECTION_METHOD = "temperature"
+OTSU_HIST_SHIFT = 2         # raw Otsu histogram bins of 4 raw units (0.04 °C)...
+OTSU_MAX_BIN_BITS = 11      # ...coarsened to at most 2048 bins over the frame's range
+OTSU_BACKEND = "auto"       # fastest exact raw-histogram Otsu at startup, or a name in detectors.OTSU_BACKENDS
+                            # ("cv2-uint8" = the original normalize + OpenCV path, 256 bins)
+DETECTOR_BACKEND = "auto"   # fastest matching compare backend at startup, or a name in detectors.DETECTORS
+
+# Active-region tracking: only re-run detection on tiles near the front
+# (temperature detection only)
+ACTIVE_REGION_TRACKING = False
+ACTIVE_TILE_SIZE = 10
+ACTIVE_TILE_EPSILON_C = 2.0
+ACTIVE_REFRESH_INTERVAL = 45
+
+# Region of interest (pixel coordinates, full 160×120 frame)
+CHAMBER_ID = "chamber-1"
+ROI_POLYGON = None          # e.g. [(20, 10), (140, 10), (140, 110), (20, 110)]
+ROI_MASK_PATH = None        # .npy mask, non-zero = analyzed
+ROI_AUTO_DETECT = False     # find the sample tray on the first frame, cached per chamber
+ROI_AUTO_FRAMES = 5         # frames averaged by `python3 roi.py` when detecting offline
+ROI_CACHE_PATH = os.path.expanduser("~/.fire_roi_cache.json")
+
+# Multi-sample runs: one polygon (or label) per sample, analyzed in one pass
+SAMPLE_POLYGONS = None      # e.g. [[(5, 20), (75, 20), (75, 100), (5, 100)], [(85, 20), ...]]
+SAMPLE_LABEL_MAP_PATH = None  # .npy int map, 0 = ignored, 1..N = sample
 
 # Paths
 CAPTURE_FOLDER = "/tmp/lepton_capture"
@@ -33,17 +102,45 @@ PARTIAL_RESULTS_PATH = "/tmp/burn_partial_results.json"
 UART_PORT = "/dev/serial0"
 UART_BAUDRATE = 9600
 UART_TIMEOUT = 1.0
+UART_POLL_INTERVAL = 0.1
+
+# Bluetooth (HM-10 on bit-banged GPIO, results to phone)
+BLUETOOTH_RESULTS = False
+BLUETOOTH_TX_PIN = 18
+BLUETOOTH_BAUD = 9600
 
 # Analysis
 DEFAULT_CAPTURE_DURATION = 3600
 DEFAULT_CAPTURE_FPS = 9
 NUM_ANALYZER_THREADS = 2
+SKIP_DUPLICATE_FRAMES = True  # crc32 of the raw buffer; repeats only advance the time base
 
 # Results
 RESULTS_FILE = "/tmp/burn_analysis_results.json"
+MAPS_FILE = "/tmp/burn_maps.npz"
+TEMP_INTEGRAL_MAP = False   # also accumulate per-pixel (T - baseline)·dt while burning
+SESSION_DB = True           # keep every session, frame series and summary in SQLite (session_db.py)
+SESSION_DB_PATH = os.path.expanduser("~/.fire_sessions.db")
+SESSION_DB_BATCH_FRAMES = 50  # frames per insert transaction
+SESSION_DB_FLUSH_INTERVAL = 2.0  # seconds a partial batch may wait
+CHECKPOINT_JOURNAL = True   # journal frames + snapshot analyzer state so a crashed run resumes (checkpoint.py)
+CHECKPOINT_DIR = os.path.expanduser("~/.fire_checkpoint")
+CHECKPOINT_SNAPSHOT_FRAMES = 90  # frames between analyzer snapshots (~10 s at 9 fps)
+CHECKPOINT_FSYNC_INTERVAL = 1.0  # seconds between journal fsyncs
+CHECKPOINT_RESUME_IDLE_SEC = 5   # after a resume, finish once no new frame arrived for this long
 SEND_LIVE_UPDATES = True
 LIVE_UPDATE_INTERVAL = 10
 
+# Live frame stream (network bridge)
+STREAM_PORT = 5001
+STREAM_DOWNSAMPLE = 2
+STREAM_MAX_FPS = 4
+STREAM_QUEUE_SIZE = 4
+STREAM_KEYFRAME_INTERVAL = 30
+
+# Metrics (Prometheus endpoint on the network bridge)
+METRICS_PORT = 9100
+
 # Data format
 DTYPE_RAW = ">u2"
 BYTES_PER_PIXEL = 2
@@ -54,9 +151,26 @@ DEBUG_MODE = True
 SAVE_DEBUG_IMAGES = False
 DEBUG_OUTPUT_FOLDER = "/tmp/burn_debug"
 
+# Logging (fire_log ring buffer, drained by a background thread)
+LOG_RING_SIZE = 2000
+LOG_FLUSH_INTERVAL = 0.5
+LOG_DEFAULT_LEVEL = "INFO"
+LOG_LEVELS = {
+    "watcher": "INFO",
+    "processor": "INFO",
+    "analyzer": "INFO",
+    "uart": "DEBUG" if DEBUG_MODE else "INFO",
+}
+# Per-frame events are only logged every Nth occurrence
+LOG_SAMPLE_EVERY = {
+    "watcher.frame": 90,
+    "analyzer.frame": 90,
+}
+
 # BURN ANALYZER SETTINGS FOR AUTO STOP FEATURE
-ROS_STOP_THRESHOLD = 0.02
-MIN_ZERO_FRAMES = 30
+ROS_STOP_THRESHOLD = 0.02      # cm²/s, compared with the windowed ROS
+MIN_ZERO_FRAMES = 30            # consecutive quiet frames before the burn counts as stopped
+ROS_WINDOW_FRAMES = 9           # frames in the ROS regression window (~1 s at 9 fps)
 
 # UART CONTROLLER FIRESTATUS COMMAND FIRE_LIT SETTING
 FIRE_LIT_FIRESTATUS = 0.005
@@ -0,0 +1,161 @@
+# detectors.py
+# Burn-detection backends: raw uint16 frame + raw threshold in, preallocated
+# uint8 mask (0/255) out
+#
+# The detection method only decides the threshold (baseline + delta, or Otsu);
+# the backends implement the per-pixel compare. Every backend must produce
+# exactly the reference (first registered) output; select() benchmarks them
+# on a real frame at startup and keeps the fastest one that agrees.
+#
+# Otsu thresholds have backends of their own (raw values in, raw threshold
+# out), chosen the same way by select_otsu(); inexact ones are only used when
+# configured by name.
+
+import time
+import numpy as np
+import cv2
+import config
+import utils
+
+DETECTORS = {}
+OTSU_BACKENDS = {}      # name → (fn(raw_values) → raw threshold, exact)
+
+# Celsius value of every possible raw reading, for exact raw thresholds
+_CELSIUS_LUT = utils.raw_to_celsius(np.arange(65536, dtype=np.uint16))
+
+
+def register(name):
+    """Add a backend fn(raw, out, threshold_raw) → out."""
+    def wrap(function):
+        DETECTORS[name] = function
+        return function
+    return wrap
+
+
+def raw_threshold(threshold_celsius):
+    """Largest raw value whose °C conversion is <= threshold, so raw > t ⇔ celsius > threshold."""
+    return int(np.searchsorted(_CELSIUS_LUT, threshold_celsius, side="right")) - 1
+
+
+@register("numpy-float")
+def compare_numpy_float(raw, out, threshold_raw):
+    # Reference: the original float path, convert then compare in °C
+    np.greater(utils.raw_to_celsius(raw), _CELSIUS_LUT[threshold_raw], out=out.view(bool))
+    np.multiply(out, 255, out=out)
+    return out
+
+
+@register("numpy-int")
+def compare_numpy_int(raw, out, threshold_raw):
+    np.greater(raw, threshold_raw, out=out.view(bool))
+    np.multiply(out, 255, out=out)
+    return out
+
+
+@register("cv2")
+def compare_cv2(raw, out, threshold_raw):
+    # Saturates to 0/255 directly; needs native-endian uint16 input
+    cv2.compare(raw, threshold_raw, cv2.CMP_GT, dst=out)
+    return out
+
+
+def register_otsu(name, exact=True):
+    """Add an Otsu backend; exact ones must return the reference (first registered) threshold."""
+    def wrap(function):
+        OTSU_BACKENDS[name] = (function, exact)
+        return function
+    return wrap
+
+
+@register_otsu("numpy-bincount")
+def otsu_numpy_bincount(values):
+    # Reference: shifted uint16 histogram, 0.04 °C bins
+    return utils.otsu_threshold_raw(values)
+
+
+@register_otsu("cv2-calchist")
+def otsu_cv2_calchist(values):
+    # Same bins as the reference, histogram from OpenCV instead of np.bincount
+    values = np.ascontiguousarray(values)
+    low, high, shift = utils.otsu_binning(values)
+    bins = ((high - low) >> shift) + 1
+    hist = cv2.calcHist([values], [0], None, [bins], [low, low + (bins << shift)])
+    return low + ((utils.otsu_split(hist.reshape(-1)) + 1) << shift) - 1
+
+
+@register_otsu("cv2-uint8", exact=False)
+def otsu_cv2_uint8(values):
+    # The original path: min-max normalize to 8 bits (1/255 of the range per bin), OpenCV Otsu
+    low, high = int(values.min()), int(values.max())
+    if high == low:
+        return high
+    values = np.ascontiguousarray(values)
+    frame_uint8 = cv2.normalize(values, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U).reshape(values.shape)
+    level, _ = cv2.threshold(frame_uint8, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Hottest raw value left in the cold class, so raw > t reproduces the 8-bit split exactly
+    cold = cv2.compare(frame_uint8, level, cv2.CMP_LE)
+    return int(cv2.minMaxLoc(values.reshape(len(values), -1), cold.reshape(len(values), -1))[1])
+
+
+def select(sample_raw, backend=None, repeat=50):
+    """Detector function, benchmarked on sample_raw unless a backend is configured."""
+    backends = DETECTORS
+    backend = backend or config.DETECTOR_BACKEND
+    if backend != "auto":
+        return backends[backend]
+
+    sample_raw = np.ascontiguousarray(sample_raw, dtype=np.uint16)
+    # Split the sample at its median so every backend sees both classes
+    threshold = int(np.median(sample_raw))
+    reference_name, reference = next(iter(backends.items()))
+    expected = reference(sample_raw, np.zeros(sample_raw.shape, np.uint8), threshold).copy()
+
+    timings = {}
+    out = np.zeros(sample_raw.shape, np.uint8)
+    for name, function in backends.items():
+        try:
+            if not np.array_equal(function(sample_raw, out, threshold), expected):
+                print(f"[Detectors] {name}: output differs from {reference_name}, skipped")
+                continue
+            start = time.perf_counter()
+            for _ in range(repeat):
+                function(sample_raw, out, threshold)
+            timings[name] = (time.perf_counter() - start) / repeat
+        except (cv2.error, TypeError, ValueError) as e:
+            print(f"[Detectors] {name}: unavailable ({e})")
+
+    best = min(timings, key=timings.get)
+    ranking = ", ".join(f"{n} {t * 1e6:.0f}µs" for n, t in sorted(timings.items(), key=lambda x: x[1]))
+    print(f"[Detectors] Using {best} ({ranking})")
+    return backends[best]
+
+
+def select_otsu(sample_values, backend=None, repeat=50):
+    """Otsu backend function, benchmarked on sample_values unless a backend is configured."""
+    backend = backend or config.OTSU_BACKEND
+    if backend != "auto":
+        return OTSU_BACKENDS[backend][0]
+
+    sample_values = np.ascontiguousarray(sample_values, dtype=np.uint16)
+    reference_name, (reference, _) = next(iter(OTSU_BACKENDS.items()))
+    expected = reference(sample_values)
+
+    timings = {}
+    for name, (function, exact) in OTSU_BACKENDS.items():
+        if not exact:
+            continue
+        try:
+            if function(sample_values) != expected:
+                print(f"[Detectors] Otsu {name}: threshold differs from {reference_name}, skipped")
+                continue
+            start = time.perf_counter()
+            for _ in range(repeat):
+                function(sample_values)
+            timings[name] = (time.perf_counter() - start) / repeat
+        except (cv2.error, TypeError, ValueError) as e:
+            print(f"[Detectors] Otsu {name}: unavailable ({e})")
+
+    best = min(timings, key=timings.get)
+    ranking = ", ".join(f"{n} {t * 1e6:.0f}µs" for n, t in sorted(timings.items(), key=lambda x: x[1]))
+    print(f"[Detectors] Otsu using {best} ({ranking})")
+    return OTSU_BACKENDS[best][0]
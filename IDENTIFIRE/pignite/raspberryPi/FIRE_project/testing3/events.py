@@ -0,0 +1,41 @@
+# events.py
+# Small in-process event bus for analyzer notifications (fire lit, fire stopped, ...)
+
+import threading
+import fire_log
+
+log = fire_log.get_logger("events")
+
+
+class EventBus:
+    """Named events with persistent or one-shot subscribers.
+
+    emit() calls handlers synchronously on the emitting thread (usually a
+    frame worker holding the analyzer lock): handlers must return quickly
+    and hand anything blocking to their own thread.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event, handler, once=False):
+        """Call handler(**payload) on every emit of event (only the first with once=True)."""
+        with self._lock:
+            self._handlers.setdefault(event, []).append((handler, once))
+        return handler
+
+    def unsubscribe(self, event, handler):
+        with self._lock:
+            self._handlers[event] = [(h, o) for h, o in self._handlers.get(event, []) if h is not handler]
+
+    def emit(self, event, **payload):
+        with self._lock:
+            handlers = self._handlers.get(event, [])
+            # One-shot handlers are dropped before being called, so a re-entrant emit cannot repeat them
+            self._handlers[event] = [(h, o) for h, o in handlers if not o]
+        for handler, _ in handlers:
+            try:
+                handler(**payload)
+            except Exception:
+                log.exception("handler failed", extra={"fields": {"event": event}})
@@ -0,0 +1,130 @@
+# fire_front.py
+# Active fire front (newly burned boundary pixels) and linear spread rates per frame
+
+import collections
+import numpy as np
+import cv2
+import config
+import geometry
+
+
+class FireFrontTracker:
+    """Front length, centroid velocity and head-fire linear ROS from the cumulative burn mask.
+
+    Works in ROI-window coordinates; positions are pixel centres projected on
+    the sample plane (geometry.plane_coordinates), so cm values follow the lens model.
+    """
+
+    def __init__(self, roi, window_frames=None):
+        self.roi = roi
+        self._project()
+
+        self.new_map = np.zeros(self.x_cm.shape, dtype=bool)
+        self.origin = None
+        self.head_history = collections.deque(maxlen=window_frames or config.FRONT_ROS_WINDOW)
+        self.last_centroid = None
+        self.last_time = None
+        self.last_result = self._empty()
+
+    def _project(self):
+        centre_x, centre_y = geometry.pixel_centres()
+        self.x_cm = np.ascontiguousarray(self.roi.crop(centre_x))
+        self.y_cm = np.ascontiguousarray(self.roi.crop(centre_y))
+
+    def __getstate__(self):
+        # Positions follow from the ROI and lens model, rebuilt when unpickled (checkpoint snapshots)
+        state = dict(self.__dict__)
+        del state['x_cm'], state['y_cm']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._project()
+
+    @staticmethod
+    def _empty():
+        return {
+            'front_length_cm': 0.0,
+            'front_centroid_velocity_cm_per_sec': 0.0,
+            'head_distance_cm': 0.0,
+            'head_direction_deg': None,
+            'head_ros_cm_per_sec': 0.0,
+        }
+
+    def set_origin(self, cumulative_mask):
+        """Ignition point: centroid of what has burned when ignition is declared."""
+        rows, cols = np.nonzero(cumulative_mask)
+        self.origin = (float(self.x_cm[rows, cols].mean()), float(self.y_cm[rows, cols].mean()))
+
+    def update(self, cumulative_mask, new_pixels, elapsed_time):
+        """Front metrics for this frame; only does contour work when pixels newly burned."""
+        if self.origin is None:
+            return self.last_result
+        if new_pixels.size == 0:
+            result = dict(self.last_result, front_length_cm=0.0, front_centroid_velocity_cm_per_sec=0.0)
+            self._record_head(elapsed_time, result['head_distance_cm'])
+            result['head_ros_cm_per_sec'] = self._head_ros()
+            return result
+
+        self.new_map.reshape(-1)[new_pixels] = True
+        contours_info = cv2.findContours(cumulative_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        contours = contours_info[0] if len(contours_info) == 2 else contours_info[1]
+
+        length = 0.0
+        front_x, front_y = [], []
+        for contour in contours:
+            cols, rows = contour[:, 0, 0], contour[:, 0, 1]
+            active = self.new_map[rows, cols]
+            if not active.any():
+                continue
+            px, py = self.x_cm[rows, cols], self.y_cm[rows, cols]
+            # Length along the contour between consecutive active points (closed loop)
+            both = active & np.roll(active, -1)
+            steps = np.hypot(np.roll(px, -1) - px, np.roll(py, -1) - py)
+            length += float(steps[both].sum())
+            front_x.append(px[active])
+            front_y.append(py[active])
+        self.new_map.reshape(-1)[new_pixels] = False
+
+        if not front_x:
+            # New pixels were all interior (holes filling in), the front did not move
+            return self.update(cumulative_mask, new_pixels[:0], elapsed_time)
+
+        front_x = np.concatenate(front_x)
+        front_y = np.concatenate(front_y)
+        centroid = (float(front_x.mean()), float(front_y.mean()))
+        velocity = 0.0
+        if self.last_centroid is not None and elapsed_time > self.last_time:
+            velocity = float(np.hypot(centroid[0] - self.last_centroid[0], centroid[1] - self.last_centroid[1])
+                             / (elapsed_time - self.last_time))
+        self.last_centroid = centroid
+        self.last_time = elapsed_time
+
+        # Head fire: front point furthest from ignition
+        distance = np.hypot(front_x - self.origin[0], front_y - self.origin[1])
+        head = int(np.argmax(distance))
+        head_distance = max(float(distance[head]), self.last_result['head_distance_cm'])
+        direction = float(np.degrees(np.arctan2(front_y[head] - self.origin[1], front_x[head] - self.origin[0])))
+        self._record_head(elapsed_time, head_distance)
+
+        self.last_result = {
+            'front_length_cm': length,
+            'front_centroid_velocity_cm_per_sec': velocity,
+            'head_distance_cm': head_distance,
+            'head_direction_deg': direction,
+            'head_ros_cm_per_sec': self._head_ros(),
+        }
+        return self.last_result
+
+    def _record_head(self, elapsed_time, head_distance):
+        self.head_history.append((elapsed_time, head_distance))
+
+    def _head_ros(self):
+        """Slope of head distance over the last FRONT_ROS_WINDOW frames (cm/s)."""
+        if len(self.head_history) < 2:
+            return 0.0
+        times, distances = np.array(self.head_history).T
+        if np.ptp(times) <= 0:
+            return 0.0
+        slope = np.polyfit(times, distances, 1)[0]
+        return float(max(slope, 0.0))
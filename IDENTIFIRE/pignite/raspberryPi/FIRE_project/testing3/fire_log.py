@@ -0,0 +1,124 @@
+# fire_log.py
+# Structured logging through a bounded in-memory ring drained by a background thread
+
+import sys
+import time
+import atexit
+import logging
+import itertools
+import threading
+import collections
+import config
+
+
+ROOT_LOGGER = "fire"
+
+_ring = collections.deque(maxlen=config.LOG_RING_SIZE)
+_wakeup = threading.Event()
+_setup_lock = threading.Lock()
+_drain_thread = None
+_dropped = 0
+_trace_ids = itertools.count(1)
+_sample_counts = collections.Counter()
+
+
+class RingHandler(logging.Handler):
+    """Appends records to the ring; never blocks or formats on the caller's thread."""
+
+    def emit(self, record):
+        global _dropped
+        if len(_ring) == _ring.maxlen:
+            _dropped += 1  # deque drops the oldest record
+        _ring.append(record)
+        _wakeup.set()
+
+
+class StructuredFormatter(logging.Formatter):
+    """time level subsystem [trace] message key=value ..."""
+
+    def format(self, record):
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        subsystem = record.name[len(ROOT_LOGGER) + 1:] or ROOT_LOGGER
+        line = f"{stamp}.{int(record.msecs):03d} {record.levelname:<7} {subsystem:<10}"
+
+        trace = getattr(record, "trace", None)
+        if trace is not None:
+            line += f" [{trace}]"
+        line += f" {record.getMessage()}"
+
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def _drain(stream, formatter):
+    while True:
+        _wakeup.wait(config.LOG_FLUSH_INTERVAL)
+        _wakeup.clear()
+        flush(stream, formatter)
+
+
+def flush(stream=None, formatter=None):
+    """Write out everything currently in the ring."""
+    stream = stream or sys.stdout
+    formatter = formatter or StructuredFormatter()
+    lines = []
+    while _ring:
+        try:
+            lines.append(formatter.format(_ring.popleft()))
+        except IndexError:
+            break
+    if lines:
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+
+
+def setup(stream=None):
+    """Install the ring handler, per-subsystem levels and the drain thread (idempotent)."""
+    global _drain_thread
+    with _setup_lock:
+        if _drain_thread is not None:
+            return
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(config.LOG_DEFAULT_LEVEL)
+        root.propagate = False
+        root.addHandler(RingHandler())
+
+        for subsystem, level in config.LOG_LEVELS.items():
+            logging.getLogger(f"{ROOT_LOGGER}.{subsystem}").setLevel(level)
+
+        stream = stream or sys.stdout
+        formatter = StructuredFormatter()
+        _drain_thread = threading.Thread(target=_drain, args=(stream, formatter), name="Log-drain", daemon=True)
+        _drain_thread.start()
+        atexit.register(flush, stream, formatter)
+
+
+def get_logger(subsystem):
+    """Logger for one subsystem, e.g. get_logger("uart")."""
+    setup()
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+
+def new_trace_id():
+    """Short per-frame ID carried from ingest to accumulation."""
+    return f"f{next(_trace_ids):06x}"
+
+
+def sampled(key, every=None):
+    """True for the first and then every Nth call for key (config.LOG_SAMPLE_EVERY)."""
+    if every is None:
+        every = config.LOG_SAMPLE_EVERY.get(key, 1)
+    count = _sample_counts[key]
+    _sample_counts[key] = count + 1
+    return count % every == 0
+
+
+def dropped_count():
+    """Records lost because the ring was full."""
+    return _dropped
@@ -0,0 +1,222 @@
+# frame_streamer.py
+# Streams downsampled, delta-encoded thermal frames and the burn mask to TCP subscribers
+
+import socket
+import struct
+import threading
+import time
+import zlib
+import queue
+import numpy as np
+import config
+
+
+# Message header: magic, frame number, width, height, flags, elapsed seconds, payload length
+HEADER_FORMAT = ">4sIHHBfI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b"FIRE"
+FLAG_KEYFRAME = 0x01
+
+
+def downsample_frame(celsius_frame, burn_mask, factor):
+    """Block-reduce a frame to (temps_uint8, mask_bool), keeping the hottest pixel per block."""
+    height = (celsius_frame.shape[0] // factor) * factor
+    width = (celsius_frame.shape[1] // factor) * factor
+    shape = (height // factor, factor, width // factor, factor)
+
+    temps = celsius_frame[:height, :width].reshape(shape).max(axis=(1, 3))
+    mask = burn_mask[:height, :width].reshape(shape).max(axis=(1, 3)) > 0
+
+    # Fixed 0..MAX_TEMP_CELSIUS scale so deltas between frames stay meaningful
+    scale = 255.0 / config.MAX_TEMP_CELSIUS
+    quantized = np.clip(temps * scale, 0, 255).astype(np.uint8)
+    return quantized, mask
+
+
+def encode_frame(frame_number, elapsed_sec, temps, mask, previous=None):
+    """Encode one message; delta against `previous` (uint8 temps) unless it is None."""
+    if previous is None:
+        flags = FLAG_KEYFRAME
+        body = temps
+    else:
+        flags = 0
+        body = temps - previous  # uint8 wraps, decoder adds back modulo 256
+
+    payload = zlib.compress(body.tobytes() + np.packbits(mask).tobytes(), 1)
+    header = struct.pack(HEADER_FORMAT, MAGIC, frame_number, temps.shape[1], temps.shape[0],
+                         flags, elapsed_sec or 0.0, len(payload))
+    return header + payload
+
+
+def decode_frame(header_bytes, payload, previous=None):
+    """Decode one message into (frame_number, elapsed_sec, celsius_frame, mask, temps_uint8)."""
+    magic, frame_number, width, height, flags, elapsed, _ = struct.unpack(HEADER_FORMAT, header_bytes)
+    if magic != MAGIC:
+        raise ValueError(f"Bad stream magic: {magic!r}")
+
+    data = zlib.decompress(payload)
+    pixels = width * height
+    body = np.frombuffer(data[:pixels], dtype=np.uint8).reshape((height, width))
+    mask = np.unpackbits(np.frombuffer(data[pixels:], dtype=np.uint8))[:pixels].reshape((height, width))
+
+    if flags & FLAG_KEYFRAME:
+        temps = body.copy()
+    else:
+        if previous is None:
+            raise ValueError("Delta frame received before a keyframe")
+        temps = previous + body
+
+    celsius = temps.astype(np.float32) * (config.MAX_TEMP_CELSIUS / 255.0)
+    return frame_number, elapsed, celsius, mask.astype(bool), temps
+
+
+class _Subscriber:
+    """Per-client encoder state."""
+
+    def __init__(self, conn, addr):
+        self.conn = conn
+        self.addr = addr
+        self.previous = None
+        self.last_sent = 0.0
+        self.frames_since_key = 0
+
+
+class FrameStreamer:
+    """Publishes analyzed frames to TCP subscribers from its own encoder thread."""
+
+    def __init__(self, downsample=None, max_fps=None, queue_size=None, keyframe_interval=None):
+        self.downsample = downsample or config.STREAM_DOWNSAMPLE
+        self.max_fps = max_fps or config.STREAM_MAX_FPS
+        self.keyframe_interval = keyframe_interval or config.STREAM_KEYFRAME_INTERVAL
+        self.frame_queue = queue.Queue(maxsize=queue_size or config.STREAM_QUEUE_SIZE)
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.running = False
+        self.server_sock = None
+        self.frames_dropped = 0
+
+    def publish(self, frame_result, celsius_data, burn_mask):
+        """Analyzer frame listener - never blocks the analysis path."""
+        if not self.subscribers:
+            return
+
+        item = (frame_result['frame_number'], frame_result['elapsed_sec'], celsius_data, burn_mask.copy())
+        try:
+            self.frame_queue.put_nowait(item)
+        except queue.Full:
+            # Drop the oldest frame, subscribers only care about the latest
+            try:
+                self.frame_queue.get_nowait()
+                self.frames_dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.frame_queue.put_nowait(item)
+            except queue.Full:
+                self.frames_dropped += 1
+
+    def start(self, port=None):
+        """Start the accept and encoder threads."""
+        port = port or config.STREAM_PORT
+        self.server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_sock.bind(('0.0.0.0', port))
+        self.server_sock.listen(4)
+
+        self.running = True
+        threading.Thread(target=self._accept_loop, name="Stream-accept", daemon=True).start()
+        threading.Thread(target=self._encode_loop, name="Stream-encoder", daemon=True).start()
+        print(f"[Stream] Listening on port {port} ({self.max_fps} FPS cap, 1/{self.downsample} scale)")
+
+    def stop(self):
+        self.running = False
+        if self.server_sock:
+            self.server_sock.close()
+        with self.lock:
+            for sub in self.subscribers:
+                sub.conn.close()
+            self.subscribers = []
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, addr = self.server_sock.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn.settimeout(2.0)
+            with self.lock:
+                self.subscribers.append(_Subscriber(conn, addr))
+            print(f"[Stream] Subscriber connected: {addr}")
+
+    def _encode_loop(self):
+        while self.running:
+            try:
+                frame_number, elapsed, celsius, mask = self.frame_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            temps, small_mask = downsample_frame(celsius, mask, self.downsample)
+            now = time.monotonic()
+
+            with self.lock:
+                subscribers = list(self.subscribers)
+
+            for sub in subscribers:
+                if now - sub.last_sent < 1.0 / self.max_fps:
+                    continue
+
+                keyframe = sub.previous is None or sub.frames_since_key >= self.keyframe_interval
+                message = encode_frame(frame_number, elapsed, temps, small_mask,
+                                       None if keyframe else sub.previous)
+                try:
+                    sub.conn.sendall(message)
+                except OSError:
+                    self._drop(sub)
+                    continue
+
+                sub.previous = temps
+                sub.last_sent = now
+                sub.frames_since_key = 0 if keyframe else sub.frames_since_key + 1
+
+    def _drop(self, sub):
+        with self.lock:
+            if sub in self.subscribers:
+                self.subscribers.remove(sub)
+        sub.conn.close()
+        print(f"[Stream] Subscriber disconnected: {sub.addr}")
+
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Stream closed")
+        data += chunk
+    return data
+
+
+def read_stream(host, port=None):
+    """Client helper - yields decoded frames from a running streamer."""
+    port = port or config.STREAM_PORT
+    with socket.create_connection((host, port)) as sock:
+        previous = None
+        while True:
+            header = _recv_exact(sock, HEADER_SIZE)
+            payload_len = struct.unpack(HEADER_FORMAT, header)[-1]
+            payload = _recv_exact(sock, payload_len)
+            frame_number, elapsed, celsius, mask, previous = decode_frame(header, payload, previous)
+            yield frame_number, elapsed, celsius, mask
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print frames from a FIRE frame stream")
+    parser.add_argument("host", help="Pi address")
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    for frame_number, elapsed, celsius, mask in read_stream(args.host, args.port):
+        print(f"frame {frame_number} @ {elapsed:.1f}s  max {celsius.max():.1f}°C  burned {mask.mean()*100:.1f}%")
@@ -0,0 +1,70 @@
+# geometry.py
+# Per-pixel sample-plane area from camera geometry (wide-FOV correction)
+
+import functools
+import numpy as np
+import config
+
+
+def _incidence_angle(radius_px, model, distortion):
+    """Angle (rad) off the optical axis for a radius in pixels from the image centre."""
+    pitch = np.radians(config.FOV_DEGREES) / config.IMAGE_WIDTH   # rad per pixel at the centre
+    theta = radius_px * pitch
+    if model == "rectilinear":
+        # Pinhole: image radius ∝ tan θ, scaled so the horizontal edge still sits at FOV/2
+        edge = config.IMAGE_WIDTH / 2.0
+        theta = np.arctan(radius_px / edge * np.tan(np.radians(config.FOV_DEGREES) / 2))
+    k1, k2 = distortion
+    return theta * (1 + k1 * theta ** 2 + k2 * theta ** 4)
+
+
+def plane_coordinates(model=None, distortion=None):
+    """(x_cm, y_cm) on the sample plane of every pixel corner, shape (H+1, W+1)."""
+    model = model or config.LENS_MODEL
+    distortion = distortion if distortion is not None else config.LENS_DISTORTION
+    rows, cols = np.mgrid[0:config.IMAGE_HEIGHT + 1, 0:config.IMAGE_WIDTH + 1].astype(np.float64)
+    dy = rows - config.IMAGE_HEIGHT / 2.0
+    dx = cols - config.IMAGE_WIDTH / 2.0
+    radius_px = np.hypot(dx, dy)
+
+    radius_cm = config.CAMERA_DISTANCE_CM * np.tan(_incidence_angle(radius_px, model, distortion))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = np.where(radius_px > 0, radius_cm / radius_px, 0.0)
+    return dx * scale, dy * scale
+
+
+@functools.lru_cache(maxsize=4)
+def pixel_centres(model=None, distortion=None):
+    """(x_cm, y_cm) float64 (H, W) maps of each pixel centre on the sample plane (mean of its corners)."""
+    x, y = plane_coordinates(model, distortion)
+    centre_x = (x[:-1, :-1] + x[:-1, 1:] + x[1:, :-1] + x[1:, 1:]) / 4.0
+    centre_y = (y[:-1, :-1] + y[:-1, 1:] + y[1:, :-1] + y[1:, 1:]) / 4.0
+    centre_x.setflags(write=False)
+    centre_y.setflags(write=False)
+    return centre_x, centre_y
+
+
+@functools.lru_cache(maxsize=4)
+def pixel_area_map(model=None, distortion=None):
+    """float32 (H, W) map of each pixel's footprint in cm² (shoelace over its four corners).
+
+    "rectilinear" reproduces the uniform PIXEL_AREA_CM2; "equidistant" (f-θ)
+    grows towards the edges like the Lepton's wide-angle lens.
+    """
+    x, y = plane_coordinates(model, distortion)
+    # Corners in order: top-left, top-right, bottom-right, bottom-left
+    xs = (x[:-1, :-1], x[:-1, 1:], x[1:, 1:], x[1:, :-1])
+    ys = (y[:-1, :-1], y[:-1, 1:], y[1:, 1:], y[1:, :-1])
+    twice_area = sum(xs[i] * ys[(i + 1) % 4] - xs[(i + 1) % 4] * ys[i] for i in range(4))
+    area = (np.abs(twice_area) / 2.0).astype(np.float32)
+    area.setflags(write=False)
+    return area
+
+
+if __name__ == "__main__":
+    areas = pixel_area_map()
+    print(f"Lens model: {config.LENS_MODEL}, distortion {config.LENS_DISTORTION}")
+    print(f"Pixel area: centre {areas[config.IMAGE_HEIGHT // 2, config.IMAGE_WIDTH // 2]:.4f} cm², "
+          f"edge {areas[config.IMAGE_HEIGHT // 2, 0]:.4f} cm², corner {areas[0, 0]:.4f} cm² "
+          f"(uniform {config.PIXEL_AREA_CM2:.4f} cm²)")
+    print(f"Frame footprint: {areas.sum():.1f} cm²")
@@ -12,12 +12,18 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
 import config
-from uart_controller import UARTController, SystemState
+import fire_log
+import metrics
+from uart_controller import UARTController, SystemState, format_final_line
 from capture_manager import CaptureManager
 from burn_analyzer import BurnAnalyzer
+from session_db import SessionDB
+from checkpoint import CheckpointJournal
+import utils
+import auto_stop
 
-
-FIRE_IS_ACTIVE = False
+log = fire_log.get_logger("processor")
+watcher_log = fire_log.get_logger("watcher")
 
 
 class FrameProcessor:
@@ -27,6 +33,7 @@ class FrameProcessor:
         self.analyzer = analyzer
         self.uart = uart_controller
         self.frame_queue = Queue()
+        metrics.QUEUE_DEPTH.set_function(self.frame_queue.qsize)
         self.workers = []
         self.running = False
         self.frame_counter = 0
@@ -48,27 +55,26 @@ class FrameProcessor:
         """Worker thread - processes frames from queue."""
         while self.running:
             try:
-                file_path = self.frame_queue.get(timeout=1)
+                file_path, trace_id = self.frame_queue.get(timeout=1)
                 
                 # Process frame
-                result = self.analyzer.process_frame(file_path)
+                result = self.analyzer.process_frame(file_path, trace_id=trace_id)
                 self.frame_counter += 1
                 self.frame_queue.task_done()
                 
             except queue.Empty:
                 # Timeout waiting for frame - normal when idle
                 continue
-            except Exception as e:
+            except Exception:
+                metrics.FRAMES_FAILED.inc()
                 if self.running:
-                    print(f"[Processor] Error processing frame: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    log.exception("frame failed", extra={"trace": trace_id, "fields": {"file": file_path}})
                 self.frame_queue.task_done()
                 continue
     
-    def add_frame(self, file_path):
+    def add_frame(self, file_path, trace_id=None):
         """Add frame to queue."""
-        self.frame_queue.put(file_path)
+        self.frame_queue.put((file_path, trace_id))
     
     def wait_for_completion(self):
         """Wait for all queued frames to be processed."""
@@ -95,26 +101,46 @@ class FrameWatcher(FileSystemEventHandler):
         
         filename = os.path.basename(event.src_path)
         if filename.startswith(self.file_prefix) and filename.endswith(config.FILE_EXTENSION):
-            print(f"[Watcher] New frame: {filename}")
-            self.processor.add_frame(event.src_path)
+            metrics.frame_ingested()
+            trace_id = fire_log.new_trace_id()
+            if fire_log.sampled("watcher.frame"):
+                watcher_log.debug("new frame", extra={"trace": trace_id, "fields": {"file": filename}})
+            self.processor.add_frame(event.src_path, trace_id)
 
 
 class BurnChamberSystem:
     """Main system orchestrator - integrates UART, capture, and analysis."""
     
-    def __init__(self):
-        self.uart = UARTController()
+    def __init__(self, uart_port=None, uart_baudrate=None):
+        self.uart = UARTController(port=uart_port, baudrate=uart_baudrate)
         self.capture_manager = CaptureManager()
-        self.analyzer = BurnAnalyzer()
-        self.analyzer.auto_stop_callback = self._auto_stop_capture
+        self.analyzer = BurnAnalyzer(live_camera=True)
+        self._subscribe_auto_stop()
+        self.session_db = None
+        if config.SESSION_DB:
+            self.session_db = SessionDB()
+            self.analyzer.frame_listeners.append(self.session_db.record_frame)
+        self.checkpoint = None
+        if config.CHECKPOINT_JOURNAL:
+            self.checkpoint = CheckpointJournal(self.analyzer)
+            self.analyzer.frame_listeners.append(self.checkpoint.record_frame)
         self.processor = FrameProcessor(self.analyzer, self.uart)
         self.observer = None
+        self.bluetooth = None
         
         # State
         self.current_capture_duration = None
 
+    def _subscribe_auto_stop(self):
+        """One-shot FIRE_STOPPED handler on the analyzer's (per-run) event bus."""
+        self.analyzer.events.subscribe(auto_stop.FIRE_STOPPED, self._on_fire_stopped, once=True)
+    
+    def _on_fire_stopped(self, **event):
+        # Emitted on a frame worker: stopping waits for the workers, so do it on its own thread
+        threading.Thread(target=self._auto_stop_capture, daemon=True).start()
+
     def _auto_stop_capture(self):
-        """Called by BurnAnalyzer when fire has truly stopped"""
+        """Runs once per capture, after the analyzer emits FIRE_STOPPED."""
         print("[System] AUTO-STOP triggered by low ROS")
 
         # 1. Stop the camera (exactly like a real STOP command)
@@ -126,14 +152,13 @@ class BurnChamberSystem:
 
         # 3. Generate and send final results
         summary = self.analyzer.get_summary_statistics()
+        self._save_results(summary)
 
-        avg_ros = summary['avg_ros_cm2_per_sec']
-        peak_ros = summary['max_ros_cm2_per_sec']
-        burn_pct = summary['final_burn_percentage']
-
-        final_line = f"FINAL,{avg_ros:.2f},{peak_ros:.2f},{burn_pct:.1f}"
+        final_line = format_final_line(summary)
         self.uart.send_response(final_line)
         print(f"[UART] AUTO-SENT → {final_line}")
+        if self.bluetooth:
+            self.bluetooth.send_async(final_line + "\r\n")
 
         # 4. Go back to IDLE
         self.uart.update_state(SystemState.IDLE)
@@ -159,16 +184,24 @@ class BurnChamberSystem:
         else:
             print("[System] Camera verified OK")
         
-        # Setup capture folder
+        # Setup capture folder (frames of a crashed run are kept for the resume)
         print("[System] Setting up capture folder...")
         self.capture_manager.setup_tmpfs()
-        self.capture_manager.cleanup_old_frames()
+        resume_point = self.checkpoint.load() if self.checkpoint else None
+        if resume_point is not None:
+            self._restore_run(resume_point)
+        else:
+            self.capture_manager.cleanup_old_frames()
         
         # Connect UART
         print("[System] Connecting to Arduino...")
         if not self.uart.connect():
             print("[System] WARNING: UART not connected, running in standalone mode")
         
+        # Optional phone link
+        if config.BLUETOOTH_RESULTS:
+            self._connect_bluetooth()
+        
         # Start frame processor
         self.processor.start_workers()
         
@@ -176,13 +209,73 @@ class BurnChamberSystem:
         self.observer = Observer()
         handler = FrameWatcher(self.processor)
         self.observer.schedule(handler, path=config.CAPTURE_FOLDER, recursive=False)
+        watch_started = time.time()
         self.observer.start()
         
+        if resume_point is not None:
+            self._resume_backlog(watch_started)
+        
         print("[System] Initialization complete\n")
 
         self.uart.send_response("1")
 
     
+    def _restore_run(self, point):
+        """Bring the analyzer back to the last checkpoint of a run that did not finish."""
+        session = point.session
+        self.analyzer.reset()
+        self.analyzer.temp_threshold_delta = session['temp_threshold']
+        self._subscribe_auto_stop()
+        if point.state is not None:
+            self.analyzer.restore_state(point.state, point.frame_data)
+        self.checkpoint.resume(point)
+        if self.session_db:
+            # A new session row carrying the restored history
+            self.session_db.start_session(session['duration_sec'], session['temp_threshold'], session.get('moisture'))
+            for frame_result in self.analyzer.frame_data:
+                self.session_db.record_frame(frame_result)
+        self.current_capture_duration = session['duration_sec']
+        self.uart.update_state(SystemState.BUSY)
+        print(f"[System] Resuming interrupted run from frame {len(point.frame_data)} "
+              f"(source frame {self.analyzer.last_source_frame})")
+    
+    def _resume_backlog(self, watch_started):
+        """Queue the frames written after the checkpoint; the watcher covers anything newer."""
+        last = self.analyzer.last_source_frame if self.analyzer.last_source_frame is not None else -1
+        backlog = [path for path in utils.list_frame_files(config.CAPTURE_FOLDER)
+                   if utils.extract_frame_number(path) > last and os.path.getmtime(path) < watch_started]
+        for path in backlog:
+            self.processor.add_frame(path, fire_log.new_trace_id())
+        print(f"[System] Re-queued {len(backlog)} frames from {config.CAPTURE_FOLDER}")
+        threading.Thread(target=self._finish_resumed_run, daemon=True).start()
+    
+    def _finish_resumed_run(self):
+        """Background thread - complete the restored run once frames stop arriving."""
+        # The capture process may have survived the crash, so wait for the folder to go quiet
+        processed = -1
+        while processed != self.processor.frame_counter:
+            processed = self.processor.frame_counter
+            self.processor.wait_for_completion()
+            time.sleep(config.CHECKPOINT_RESUME_IDLE_SEC)
+        if self.uart.state == SystemState.BUSY:   # auto-stop may already have finished it
+            self._complete_capture()
+    
+    def _connect_bluetooth(self):
+        """Set up the HM-10 transmitter used to push results to a phone."""
+        try:
+            import pigpio
+            from bluetoothConnection import HM10Transmitter
+        except ImportError as e:
+            print(f"[System] WARNING: Bluetooth disabled ({e})")
+            return
+        
+        pi = pigpio.pi()
+        if not pi.connected:
+            print("[System] WARNING: pigpio daemon not running, Bluetooth disabled")
+            return
+        self.bluetooth = HM10Transmitter(pi, config.BLUETOOTH_TX_PIN, config.BLUETOOTH_BAUD)
+        print(f"[System] Bluetooth TX on GPIO{config.BLUETOOTH_TX_PIN} at {config.BLUETOOTH_BAUD} baud")
+    
     def shutdown(self):
         """Gracefully shutdown all components."""
         print("\n[System] Shutting down...")
@@ -192,31 +285,41 @@ class BurnChamberSystem:
             self.observer.join()
         
         self.processor.stop()
+        if self.session_db:
+            self.session_db.close()
         self.uart.disconnect()
+        if self.bluetooth:
+            self.bluetooth.close()
+            self.bluetooth.pi.stop()
         
         print("[System] Shutdown complete")
     
     # Callback functions for UART commands
     
-    def _start_capture(self, duration_sec, temp_threshold):
-        """UART callback - start capture."""
-        print(f"[System] Starting capture: {duration_sec}s, threshold: {temp_threshold}°C")
+    def _start_capture(self, duration_sec, temp_threshold, moisture=None):
+        """UART callback - start capture (moisture: optional burn-sequence level from the Arduino)."""
+        print(f"[System] Starting capture: {duration_sec}s, threshold: {temp_threshold}°C"
+              + (f", moisture: {moisture}" if moisture else ""))
         
         # Update analyzer threshold
         self.analyzer.reset()
         self.analyzer.temp_threshold_delta = temp_threshold
-
-        self.analyzer.auto_stop_callback = self._auto_stop_capture
-
+        self._subscribe_auto_stop()
         
         # Cleanup old frames
         self.capture_manager.cleanup_old_frames()
+        metrics.reset_ingest_rate()
         
         # Start capture
         success = self.capture_manager.start_capture(duration_sec=duration_sec)
         
         if success:
             self.current_capture_duration = duration_sec
+            if self.session_db:
+                self.session_db.start_session(duration_sec, temp_threshold, moisture)
+            if self.checkpoint:
+                self.checkpoint.start({'duration_sec': duration_sec, 'temp_threshold': temp_threshold,
+                                       'moisture': moisture, 'started_at': time.time()})
             self.uart.update_state(SystemState.BUSY)
             
             # Start monitoring thread
@@ -250,12 +353,15 @@ class BurnChamberSystem:
                 json.dump(partial_summary, f)
         
         self.processor.wait_for_completion()
-        
-        # Generate final results
+        self._complete_capture()
+    
+    def _complete_capture(self):
+        """Save, store and send the final results of the current run."""
         print("[System] Analysis complete, generating results...")
         summary = self.analyzer.get_summary_statistics()
         
         # Store and send results
+        self._save_results(summary)
         self.uart.store_results(summary)
         self.uart.send_response({
             "status": "complete",
@@ -263,13 +369,31 @@ class BurnChamberSystem:
             **summary
         })
         
+        if self.bluetooth:
+            self.bluetooth.send_async(format_final_line(summary) + "\r\n")
+        
         # Print summary
         self.analyzer.print_summary()
     
+    def _save_results(self, summary):
+        """Write final results plus pipeline metrics to RESULTS_FILE."""
+        import json
+        
+        with open(config.RESULTS_FILE, "w") as f:
+            json.dump({**summary, "metrics": metrics.summary()}, f, indent=2, default=str)
+        self.analyzer.export_maps()
+        if self.session_db:
+            sample_areas = self.analyzer.sample_area_cm2
+            self.session_db.finish_session(summary, None if sample_areas is None else sample_areas.tolist())
+        if self.checkpoint:
+            self.checkpoint.finish()
+    
     def _stop_capture(self):
         """UART callback - emergency stop."""
         print("[System] Emergency stop requested")
         self.capture_manager.stop_capture()
+        if self.checkpoint:
+            self.checkpoint.finish()
         self.uart.update_state(SystemState.IDLE)
     
     def _get_status(self):
@@ -290,6 +414,8 @@ class BurnChamberSystem:
         """UART callback - reset system."""
         print("[System] Resetting system...")
         self.analyzer.reset()
+        if self.checkpoint:
+            self.checkpoint.finish()
         self.capture_manager.cleanup_old_frames()
         self.processor.frame_counter = 0
     
@@ -302,7 +428,9 @@ class BurnChamberSystem:
             'start': self._start_capture,
             'stop': self._stop_capture,
             'status': self._get_status,
-            'reset': self._reset_system
+            'reset': self._reset_system,
+            'fire_status': self.analyzer.check_fire_lit,
+            'force': self.analyzer.force_ignition,
         }
         
         try:
@@ -310,14 +438,9 @@ class BurnChamberSystem:
             
             while True:
                 # Check for UART commands
-                cmd_str = self.uart.read_command()
-                
-                if cmd_str:
-                    command, args = self.uart.parse_command(cmd_str)
-                    response = self.uart.handle_command(command, args, callbacks)
-                    self.uart.send_response(response)
+                self.uart.poll(callbacks)
                 
-                time.sleep(0.1)
+                time.sleep(config.UART_POLL_INTERVAL)
         
         except KeyboardInterrupt:
             print("\n[System] Interrupted by user")
@@ -338,7 +461,7 @@ def standalone_capture(duration_sec=None, temp_threshold=None):
     config.print_config()
     
     capture_manager = CaptureManager()
-    analyzer = BurnAnalyzer(temp_threshold_delta=temp_threshold)
+    analyzer = BurnAnalyzer(temp_threshold_delta=temp_threshold, live_camera=True)
     processor = FrameProcessor(analyzer, uart_controller=None)
     
     # Setup
@@ -386,15 +509,13 @@ if __name__ == "__main__":
     parser.add_argument("--standalone", action="store_true", help="Run in standalone mode (no UART)")
     parser.add_argument("--duration", type=int, default=None, help="Capture duration in seconds")
     parser.add_argument("--threshold", type=int, default=None, help="Temperature threshold (°C)")
+    parser.add_argument("--uart-port", default=None, help="Serial port override (e.g. arduino_simulator pty)")
+    parser.add_argument("--baud", type=int, default=None, help="UART baud rate override")
     
     args = parser.parse_args()
     
     if args.standalone:
         standalone_capture(args.duration, args.threshold)
     else:
-        system = BurnChamberSystem()
-        system.analyzer.ignition_frame = 1
-        system.analyzer.ignition_time = 0.0
-        system.analyzer.auto_stop_callback = system._auto_stop_capture
-
+        system = BurnChamberSystem(uart_port=args.uart_port, uart_baudrate=args.baud)
         system.run()
@@ -0,0 +1,297 @@
+# metrics.py
+# Counters, gauges and latency histograms for the capture/analysis pipeline
+# (Prometheus text exposition + JSON summary)
+
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+
+
+def _escape_label(value):
+    """Label value escaped for the text exposition format (backslash, quote, newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.children = {}
+
+    def labels(self, *values):
+        """Child metric for one label combination."""
+        key = tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(key, self._new_child())
+        return child
+
+    def _label_str(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+    def _items(self):
+        if not self.labelnames:
+            return [((), self)]
+        return sorted(self.children.items())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.value = 0
+
+    def _new_child(self):
+        return Counter(self.name, self.help)
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def render(self):
+        return [f"{self.name}{self._label_str(key)} {child.value}" for key, child in self._items()]
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self.value
+        return {",".join(key): child.value for key, child in self._items()}
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.value = 0
+        self.function = None
+
+    def _new_child(self):
+        return Gauge(self.name, self.help)
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Read the value from function() at scrape time (e.g. queue.qsize)."""
+        self.function = function
+
+    def get(self):
+        return self.function() if self.function else self.value
+
+    def render(self):
+        return [f"{self.name}{self._label_str(key)} {child.get()}" for key, child in self._items()]
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self.get()
+        return {",".join(key): child.get() for key, child in self._items()}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def _new_child(self):
+        return Histogram(self.name, self.help, self.buckets)
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def time(self):
+        """Context manager observing the elapsed seconds of a block."""
+        return _Timer(self)
+
+    def quantile(self, q):
+        """Upper bucket bound containing quantile q (bucket resolution)."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return self.max
+
+    def render(self):
+        lines = []
+        for key, child in self._items():
+            running = 0
+            for bound, count in zip(child.buckets, child.counts):
+                running += count
+                lines.append(f"{self.name}_bucket{self._label_str(key, ('le', bound))} {running}")
+            lines.append(f"{self.name}_bucket{self._label_str(key, ('le', '+Inf'))} {child.count}")
+            lines.append(f"{self.name}_sum{self._label_str(key)} {child.sum}")
+            lines.append(f"{self.name}_count{self._label_str(key)} {child.count}")
+        return lines
+
+    def _child_summary(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': self.max,
+        }
+
+    def snapshot(self):
+        if not self.labelnames:
+            return self._child_summary()
+        return {",".join(key): child._child_summary() for key, child in self._items()}
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.start_time = time.time()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render_prometheus(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Plain dict of every metric, for the results JSON."""
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+
+REGISTRY = Registry()
+
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FRAMES_INGESTED = REGISTRY.register(Counter(
+    "fire_frames_ingested_total", "Frames seen by the file watcher"))
+FRAMES_PROCESSED = REGISTRY.register(Counter(
+    "fire_frames_processed_total", "Frames completed by process_frame"))
+FRAMES_FAILED = REGISTRY.register(Counter(
+    "fire_frames_failed_total", "Frames that raised during processing"))
+FRAMES_DROPPED = REGISTRY.register(Counter(
+    "fire_frames_dropped_total", "Gaps in the capture frame numbering"))
+FRAMES_OUT_OF_ORDER = REGISTRY.register(Counter(
+    "fire_frames_out_of_order_total", "Frames processed after a later-numbered frame"))
+FRAMES_DUPLICATE = REGISTRY.register(Counter(
+    "fire_frames_duplicate_total", "Frames identical to the previous one, skipped"))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "fire_frame_queue_depth", "Frames waiting in frame_queue"))
+INGEST_FPS = REGISTRY.register(Gauge(
+    "fire_ingest_fps", "Frames ingested per second over the current capture"))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "fire_stage_seconds", "process_frame stage duration", STAGE_BUCKETS, labelnames=("stage",)))
+FRAME_LATENCY_SECONDS = REGISTRY.register(Histogram(
+    "fire_frame_latency_seconds", "Frame file written to result available", LATENCY_BUCKETS))
+UART_COMMAND_SECONDS = REGISTRY.register(Histogram(
+    "fire_uart_command_seconds", "UART command handling and response time", LATENCY_BUCKETS,
+    labelnames=("command",)))
+
+
+class _IngestRate:
+    """Tracks ingest FPS since the first frame of the current capture."""
+
+    def __init__(self):
+        self.first = None
+        self.count = 0
+
+    def mark(self):
+        now = time.monotonic()
+        if self.first is None:
+            self.first = now
+        self.count += 1
+        elapsed = now - self.first
+        if elapsed > 0:
+            INGEST_FPS.set(round(self.count / elapsed, 2))
+
+    def reset(self):
+        self.first = None
+        self.count = 0
+
+
+_ingest_rate = _IngestRate()
+
+
+def frame_ingested():
+    FRAMES_INGESTED.inc()
+    _ingest_rate.mark()
+
+
+def reset_ingest_rate():
+    _ingest_rate.reset()
+
+
+def render_prometheus():
+    return REGISTRY.render_prometheus()
+
+
+def summary():
+    return REGISTRY.summary()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are not worth a log line
+
+
+def start_http_server(port=None):
+    """Serve /metrics from a daemon thread."""
+    port = port or config.METRICS_PORT
+    server = ThreadingHTTPServer(('0.0.0.0', port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="Metrics-http", daemon=True).start()
+    print(f"[Metrics] Serving Prometheus metrics on port {port}")
+    return server
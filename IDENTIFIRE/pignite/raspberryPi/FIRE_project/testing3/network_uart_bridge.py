@@ -15,11 +15,17 @@ sys.path.insert(0, '/home/fire/Documents/FIRE_project/testing3')
 from uart_controller import UARTController, SystemState
 from capture_manager import CaptureManager
 from burn_analyzer import BurnAnalyzer
+from frame_streamer import FrameStreamer
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from queue import Queue
 import queue
 import config
+import fire_log
+import metrics
+
+log = fire_log.get_logger("processor")
+watcher_log = fire_log.get_logger("watcher")
 
 # Same FrameProcessor from main.py
 class FrameProcessor:
@@ -29,6 +35,7 @@ class FrameProcessor:
         self.analyzer = analyzer
         self.uart = uart_controller
         self.frame_queue = Queue()
+        metrics.QUEUE_DEPTH.set_function(self.frame_queue.qsize)
         self.workers = []
         self.running = False
         self.frame_counter = 0
@@ -50,20 +57,21 @@ class FrameProcessor:
         """Worker thread - processes frames from queue."""
         while self.running:
             try:
-                file_path = self.frame_queue.get(timeout=1)
-                result = self.analyzer.process_frame(file_path)
+                file_path, trace_id = self.frame_queue.get(timeout=1)
+                result = self.analyzer.process_frame(file_path, trace_id=trace_id)
                 self.frame_counter += 1
                 self.frame_queue.task_done()
             except queue.Empty:
                 continue
-            except Exception as e:
+            except Exception:
+                metrics.FRAMES_FAILED.inc()
                 if self.running:
-                    print(f"[Processor] Error: {e}")
+                    log.exception("frame failed", extra={"trace": trace_id, "fields": {"file": file_path}})
                 self.frame_queue.task_done()
                 continue
     
-    def add_frame(self, file_path):
-        self.frame_queue.put(file_path)
+    def add_frame(self, file_path, trace_id=None):
+        self.frame_queue.put((file_path, trace_id))
     
     def wait_for_completion(self):
         self.frame_queue.join()
@@ -83,15 +91,20 @@ class FrameWatcher(FileSystemEventHandler):
             return
         filename = os.path.basename(event.src_path)
         if filename.startswith(self.file_prefix) and filename.endswith(config.FILE_EXTENSION):
-            print(f"[Watcher] New frame: {filename}")
-            self.processor.add_frame(event.src_path)
+            metrics.frame_ingested()
+            trace_id = fire_log.new_trace_id()
+            if fire_log.sampled("watcher.frame"):
+                watcher_log.debug("new frame", extra={"trace": trace_id, "fields": {"file": filename}})
+            self.processor.add_frame(event.src_path, trace_id)
 
 class NetworkBridge:
     def __init__(self, port=5000):
         self.port = port
         self.capture_manager = CaptureManager()
-        self.analyzer = BurnAnalyzer()
+        self.analyzer = BurnAnalyzer(live_camera=True)
         self.processor = FrameProcessor(self.analyzer, None)
+        self.streamer = FrameStreamer()
+        self.analyzer.frame_listeners.append(self.streamer.publish)
         self.observer = None
         
         self.mock_uart = type('obj', (object,), {
@@ -111,6 +124,10 @@ class NetworkBridge:
         handler = FrameWatcher(self.processor)
         self.observer.schedule(handler, path=config.CAPTURE_FOLDER, recursive=False)
         self.observer.start()
+
+        # Live frame stream for viewers
+        self.streamer.start()
+        self.metrics_server = metrics.start_http_server()
         print("✓ Ready")
     
     def handle_start(self, duration_sec, temp_threshold):
@@ -121,6 +138,7 @@ class NetworkBridge:
         self.analyzer.reset()
         self.analyzer.temp_threshold_delta = temp_threshold
         self.capture_manager.cleanup_old_frames()
+        metrics.reset_ingest_rate()
         
         success = self.capture_manager.start_capture(duration_sec=duration_sec)
         
@@ -149,6 +167,9 @@ class NetworkBridge:
         self.processor.wait_for_completion()
         
         summary = self.analyzer.get_summary_statistics()
+        with open(config.RESULTS_FILE, "w") as f:
+            json.dump({**summary, "metrics": metrics.summary()}, f, indent=2, default=str)
+        self.analyzer.export_maps()
         self.mock_uart.last_results = summary
         self.mock_uart.state = SystemState.IDLE
         
@@ -212,7 +233,10 @@ class NetworkBridge:
             except:
                 return command, {"duration": 60, "threshold": 100}
         
-        return command, {}
+        if command in ("STOP", "STATUS", "RESULTS", "RESET"):
+            return command, {}
+        # One metrics label for anything else, so client input cannot add label values
+        return "UNKNOWN", {"original": cmd_str}
     
     def handle_client(self, conn, addr):
         """Handle client connection."""
@@ -225,6 +249,7 @@ class NetworkBridge:
                     break
                 
                 print(f"[Network] Received: {data}")
+                started = time.perf_counter()
                 command, args = self.parse_command(data)
                 
                 if command == "START":
@@ -238,9 +263,10 @@ class NetworkBridge:
                 elif command == "RESET":
                     response = self.handle_reset()
                 else:
-                    response = {"status": "error", "message": f"Unknown command: {command}"}
+                    response = {"status": "error", "message": f"Unknown command: {args['original']}"}
                 
-                conn.sendall(json.dumps(response).encode() + b'\n')
+                conn.sendall(json.dumps(response, default=str).encode() + b'\n')
+                metrics.UART_COMMAND_SECONDS.labels(command).observe(time.perf_counter() - started)
         
         except Exception as e:
             print(f"[Network] Error: {e}")
@@ -268,6 +294,8 @@ class NetworkBridge:
             print("\n[Network] Shutting down...")
         finally:
             sock.close()
+            self.streamer.stop()
+            self.metrics_server.shutdown()
             self.observer.stop()
             self.observer.join()
             self.processor.stop()
@@ -0,0 +1,181 @@
+# param_sweep.py
+# Offline parameter sweep over a recorded session, fanned out over a process pool
+#
+#   python3 param_sweep.py /data/burn_042 --grid BURN_TEMP_DELTA=60,80,100 \
+#       --grid MIN_CONTOUR_AREA_PIXELS=10,20 --grid MIN_ZERO_FRAMES=20,30,60 --csv sweep.csv
+
+import io
+import os
+import csv
+import itertools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import config
+import utils
+import arrival_map
+import bad_pixels
+
+# Parameters that change the per-frame burn masks; each combination is one analyzer run
+MASK_PARAMS = ("BURN_TEMP_DELTA", "MIN_CONTOUR_AREA_PIXELS", "EDGE_DETECTION_METHOD")
+# Parameters that only decide where the run stops; replayed over the area series
+STOP_PARAMS = ("ROS_STOP_THRESHOLD", "MIN_ZERO_FRAMES")
+
+_frames = None
+_bad_pixel_map = None
+
+
+def _init_worker(cache_path, bad_pixel_path=None):
+    global _frames, _bad_pixel_map
+    _frames = np.load(cache_path, mmap_mode="r")
+    _bad_pixel_map = bad_pixels.BadPixelMap.load(bad_pixel_path) if bad_pixel_path else None
+
+
+def stop_index(ros, ignition_frame, threshold, min_zero_frames):
+    """First frame where ROS stayed below threshold for min_zero_frames after ignition, else None.
+
+    Same rule as auto_stop.AutoStop, fed with the windowed ROS.
+    """
+    if ignition_frame is None:
+        return None
+    below = ros < threshold
+    below[:ignition_frame] = False
+    runs = np.cumsum(below)
+    # Length of the below-threshold run ending at each frame
+    streak = runs - np.maximum.accumulate(np.where(below, 0, runs))
+    hits = np.flatnonzero(streak >= min_zero_frames)
+    return int(hits[0]) if len(hits) else None
+
+
+def summarize_run(series, stop_params):
+    """Summary metrics for one stop configuration, truncating the series at the stop frame."""
+    elapsed, area, ros = series['elapsed'], series['area'], series['ros']
+    stop = stop_index(series['ros_windowed'], series['ignition_frame'],
+                      stop_params['ROS_STOP_THRESHOLD'], stop_params['MIN_ZERO_FRAMES'])
+    last = stop if stop is not None else len(area) - 1
+
+    positive = ros[1:last + 1][ros[1:last + 1] > 0]
+    arrival = series['arrival']
+    with np.errstate(invalid="ignore"):
+        arrival = np.where(arrival <= elapsed[last], arrival, np.nan)
+    ignition = series['ignition_frame']
+    return {
+        'frames': last + 1,
+        'duration_sec': float(elapsed[last]),
+        'final_burn_area_cm2': float(area[last]),
+        'avg_ros_cm2_per_sec': float(area[last] / elapsed[last]) if elapsed[last] > 0 else 0.0,
+        'max_ros_cm2_per_sec': float(positive.max()) if len(positive) else 0.0,
+        'linear_ros_cm_per_sec': arrival_map.linear_spread_rate(arrival, positions=series['positions']),
+        'ignition_time_sec': float(elapsed[ignition]) if ignition is not None else None,
+        'stop_time_sec': float(elapsed[stop]) if stop is not None else None,
+    }
+
+
+def _run_mask_config(mask_params, stop_grid):
+    """Analyze every session frame with one mask configuration, then replay each stop configuration."""
+    from burn_analyzer import BurnAnalyzer
+
+    for name, value in mask_params.items():
+        setattr(config, name, value)
+    # Never armed offline (no FIRESTATUS), stopping is replayed afterwards from the ROS series
+    analyzer = BurnAnalyzer(temp_threshold_delta=mask_params.get('BURN_TEMP_DELTA'), bad_pixel_map=_bad_pixel_map)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for raw in _frames:
+            analyzer.analyze_raw(raw)
+
+    frames = analyzer.frame_data
+    frame_index = np.array([f['frame_index'] for f in frames])
+    # ignition_frame counts received frames; the series only hold the analyzed ones
+    ignition = analyzer.ignition_frame
+    series = {
+        'elapsed': np.array([f['elapsed_sec'] for f in frames]),
+        'area': np.array([f['cumulative_burn_area_cm2'] for f in frames]),
+        'ros': np.array([f['ros_instantaneous_cm2_per_sec'] for f in frames], dtype=np.float64),
+        'ros_windowed': np.array([f['ros_windowed_cm2_per_sec'] for f in frames], dtype=np.float64),
+        'ignition_frame': int(np.searchsorted(frame_index, ignition)) if ignition is not None else None,
+        'arrival': analyzer.arrival_time_map,
+        'positions': analyzer.pixel_positions(),
+    }
+    return [dict(mask_params, **stop_params, **summarize_run(series, stop_params)) for stop_params in stop_grid]
+
+
+def expand_grid(grid):
+    """[{name: value}, ...] for every combination of the grid's value lists."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def sweep(session_folder, grid, workers=None, bad_pixel_path=None):
+    """Rows of parameters + summary metrics for every combination in grid.
+
+    Frames are replayed uncorrected unless bad_pixel_path names the map of
+    the camera that recorded the session.
+    """
+    unknown = set(grid) - set(MASK_PARAMS) - set(STOP_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+
+    mask_grid = expand_grid({n: v for n, v in grid.items() if n in MASK_PARAMS})
+    stop_grid = expand_grid({n: grid.get(n, [getattr(config, n)]) for n in STOP_PARAMS})
+
+    frames = utils.load_session_frames(session_folder)
+    print(f"[Sweep] {len(frames)} frames, {len(mask_grid)} mask configs × {len(stop_grid)} stop configs")
+
+    workers = workers or min(len(mask_grid), os.cpu_count() or 1)
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(frames.filename, bad_pixel_path)) as pool:
+        futures = [pool.submit(_run_mask_config, mask_params, stop_grid) for mask_params in mask_grid]
+        for future in futures:
+            rows.extend(future.result())
+    return rows
+
+
+def _parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def print_table(rows):
+    if not rows:
+        return
+    columns = list(rows[0])
+    cells = [[("-" if r[c] is None else f"{r[c]:.3f}" if isinstance(r[c], float) else str(r[c])) for c in columns]
+             for r in rows]
+    widths = [max(len(c), *(len(row[i]) for row in cells)) for i, c in enumerate(columns)]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in cells:
+        print("  ".join(v.rjust(w) for v, w in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sweep analysis parameters over a recorded session")
+    parser.add_argument("session", help="Folder of recorded .gray frames")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help=f"Values to sweep, one of {', '.join(MASK_PARAMS + STOP_PARAMS)}")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--csv", default=None, help="Also write the table as CSV")
+    parser.add_argument("--bad-pixel-map", default=None, metavar="NPY",
+                        help="Bad-pixel map of the recording camera (default: no correction)")
+    args = parser.parse_args()
+
+    grid = {}
+    for entry in args.grid:
+        name, _, values = entry.partition("=")
+        grid[name.strip()] = [_parse_value(v.strip()) for v in values.split(",") if v.strip()]
+
+    rows = sweep(args.session, grid, args.workers, args.bad_pixel_map)
+    print_table(rows)
+    if args.csv and rows:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"[Sweep] {len(rows)} rows → {args.csv}")
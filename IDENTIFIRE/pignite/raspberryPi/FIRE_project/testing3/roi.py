@@ -0,0 +1,205 @@
+# roi.py
+# Region of interest: crop window + pixel mask, with automatic sample-tray detection
+
+import os
+import json
+import numpy as np
+import cv2
+import config
+import utils
+
+
+class RegionOfInterest:
+    """Bounding window of a full-frame mask plus the mask cropped to that window.
+
+    With a label map (0 = ignored, 1..N = sample), the ROI covers several
+    samples analyzed side by side; labels holds the map cropped to the window.
+    """
+
+    def __init__(self, mask, polygon=None, labels=None):
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            raise ValueError("ROI mask is empty")
+
+        self.shape = mask.shape
+        self.polygon = polygon
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        self.window = (slice(int(rows[0]), int(rows[-1]) + 1), slice(int(cols[0]), int(cols[-1]) + 1))
+
+        cropped = mask[self.window]
+        # None when the window is fully inside the ROI (a plain rectangle)
+        self.mask = None if cropped.all() else cropped
+        self.pixel_count = int(np.count_nonzero(cropped))
+
+        self.labels = None
+        self.num_samples = 1
+        if labels is not None:
+            self.num_samples = self._check_labels(labels)
+            self.labels = np.ascontiguousarray(labels[self.window], dtype=np.intp)
+
+    @staticmethod
+    def _check_labels(labels):
+        """Number of samples; every id 1..N must label at least one pixel (a gap would be a zero-area sample)."""
+        if labels.min() < 0:
+            raise ValueError("ROI labels must be 0 (ignored) or 1..N, found negative values")
+        present = np.unique(labels[labels > 0])
+        missing = sorted(set(range(1, int(present[-1]) + 1)) - set(present.tolist()))
+        if missing:
+            raise ValueError(f"ROI labels 1..{int(present[-1])} must all be present, missing {missing} "
+                             f"(renumber the label map, or check for fully overlapping sample polygons)")
+        return len(present)
+
+    @classmethod
+    def full_frame(cls, shape):
+        return cls(np.ones(shape, dtype=bool))
+
+    @classmethod
+    def from_polygon(cls, polygon, shape):
+        """Polygon as [(x, y), ...] in pixel coordinates."""
+        mask = np.zeros(shape, dtype=np.uint8)
+        cv2.fillPoly(mask, [np.asarray(polygon, dtype=np.int32)], 1)
+        return cls(mask, polygon=[list(map(int, p)) for p in polygon])
+
+    @classmethod
+    def from_mask_file(cls, path):
+        return cls(np.load(path) > 0)
+
+    @classmethod
+    def from_polygons(cls, polygons, shape):
+        """One sample per polygon, labelled 1..N in list order."""
+        labels = np.zeros(shape, dtype=np.int32)
+        for label, polygon in enumerate(polygons, start=1):
+            cv2.fillPoly(labels, [np.asarray(polygon, dtype=np.int32)], label)
+        return cls(labels > 0, labels=labels)
+
+    @classmethod
+    def from_label_file(cls, path):
+        labels = np.load(path).astype(np.int32)
+        return cls(labels > 0, labels=labels)
+
+    @property
+    def crop_shape(self):
+        return (self.window[0].stop - self.window[0].start, self.window[1].stop - self.window[1].start)
+
+    def crop(self, frame):
+        """View of frame restricted to the ROI window."""
+        return frame[self.window]
+
+    def paste(self, cropped, fill=0):
+        """Place a cropped array back into a full-frame array."""
+        full = np.full(self.shape, fill, dtype=cropped.dtype)
+        full[self.window] = cropped
+        return full
+
+    def full_mask(self):
+        mask = np.zeros(self.shape, dtype=bool)
+        mask[self.window] = True if self.mask is None else self.mask
+        return mask
+
+
+def detect_tray(celsius_frames, min_fraction=0.05):
+    """Polygon of the sample tray from ambient frames, None if nothing plausible.
+
+    The tray is taken as the smallest Otsu component (warmer or cooler side)
+    that covers the frame centre, simplified to a convex hull.
+    """
+    mean_frame = np.mean(np.asarray(celsius_frames, dtype=np.float32), axis=0)
+    frame_uint8 = utils.normalize_to_uint8(mean_frame)
+    frame_uint8 = cv2.GaussianBlur(frame_uint8, (5, 5), 0)
+    _, thresh = cv2.threshold(frame_uint8, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    height, width = mean_frame.shape
+    centre = (width / 2.0, height / 2.0)
+    kernel = np.ones((3, 3), np.uint8)
+
+    best = None
+    for candidate in (thresh, cv2.bitwise_not(thresh)):
+        candidate = cv2.morphologyEx(candidate, cv2.MORPH_OPEN, kernel)
+        contours_info = cv2.findContours(candidate, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = contours_info[0] if len(contours_info) == 2 else contours_info[1]
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area < min_fraction * width * height:
+                continue
+            if cv2.pointPolygonTest(contour, centre, False) < 0:
+                continue
+            # Prefer the smallest region that still covers the centre (tray, not chamber)
+            if best is None or area < best[0]:
+                best = (area, contour)
+
+    if best is None:
+        return None
+    hull = cv2.convexHull(best[1])
+    return [[int(p[0][0]), int(p[0][1])] for p in hull]
+
+
+def load_cached_polygon(chamber_id=None, path=None):
+    chamber_id = chamber_id or config.CHAMBER_ID
+    path = path or config.ROI_CACHE_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f).get(chamber_id)
+
+
+def save_cached_polygon(polygon, chamber_id=None, path=None):
+    chamber_id = chamber_id or config.CHAMBER_ID
+    path = path or config.ROI_CACHE_PATH
+    cache = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            cache = json.load(f)
+    cache[chamber_id] = polygon
+    utils.ensure_dir(os.path.dirname(path) or ".")
+    with open(path, "w") as f:
+        json.dump(cache, f, indent=2)
+
+
+def resolve_roi(first_celsius_frame):
+    """ROI from config: sample map, explicit polygon, mask file, cached/auto tray, else full frame."""
+    shape = first_celsius_frame.shape
+    if config.SAMPLE_POLYGONS:
+        return RegionOfInterest.from_polygons(config.SAMPLE_POLYGONS, shape)
+    if config.SAMPLE_LABEL_MAP_PATH:
+        return RegionOfInterest.from_label_file(config.SAMPLE_LABEL_MAP_PATH)
+    if config.ROI_POLYGON:
+        return RegionOfInterest.from_polygon(config.ROI_POLYGON, shape)
+    if config.ROI_MASK_PATH:
+        return RegionOfInterest.from_mask_file(config.ROI_MASK_PATH)
+
+    if config.ROI_AUTO_DETECT:
+        polygon = load_cached_polygon()
+        if polygon is None:
+            polygon = detect_tray([first_celsius_frame])
+            if polygon is not None:
+                save_cached_polygon(polygon)
+                print(f"[ROI] Detected sample tray ({len(polygon)} points), cached for {config.CHAMBER_ID}")
+        if polygon is not None:
+            return RegionOfInterest.from_polygon(polygon, shape)
+        print("[ROI] WARNING: Tray not found, using full frame")
+
+    return RegionOfInterest.full_frame(shape)
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Detect and cache the sample tray ROI")
+    parser.add_argument("folder", nargs="?", default=config.CAPTURE_FOLDER, help="Folder with ambient .gray frames")
+    parser.add_argument("--frames", type=int, default=config.ROI_AUTO_FRAMES)
+    parser.add_argument("--chamber", default=config.CHAMBER_ID)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.folder, f"*{config.FILE_EXTENSION}")))[:args.frames]
+    if not paths:
+        raise SystemExit(f"No frames in {args.folder}")
+
+    polygon = detect_tray([utils.read_gray_file(p)[1] for p in paths])
+    if polygon is None:
+        raise SystemExit("Tray not found")
+
+    save_cached_polygon(polygon, args.chamber)
+    roi = RegionOfInterest.from_polygon(polygon, (config.IMAGE_HEIGHT, config.IMAGE_WIDTH))
+    print(f"Chamber {args.chamber}: {roi.pixel_count} px ROI in window {roi.crop_shape}, polygon {polygon}")
@@ -0,0 +1,64 @@
+# ros_estimator.py
+# Streaming rate of spread: least-squares slope of cumulative burn area over
+# the last N frames, updated in O(1) per frame with running sums
+
+import collections
+
+
+class WindowedRosEstimator:
+    """Slope of area(t) over a sliding window of (time, area) samples.
+
+    Areas may be floats or numpy arrays (one slope per sample). Times are
+    kept relative to a reference that is re-based each time the window
+    turns over, so the sums stay small and do not accumulate rounding drift.
+    """
+
+    def __init__(self, window_frames):
+        self.window = max(int(window_frames), 2)
+        self.samples = collections.deque()
+        self.reference = None
+        self.since_rebase = 0
+        self._clear_sums()
+
+    def _clear_sums(self):
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.sum_a = 0.0
+        self.sum_ta = 0.0
+
+    def _add_sums(self, t, area, sign):
+        self.sum_t += sign * t
+        self.sum_tt += sign * t * t
+        self.sum_a = self.sum_a + sign * area
+        self.sum_ta = self.sum_ta + sign * t * area
+
+    def _rebase(self):
+        """Recompute the sums around the oldest sample (O(N) once every N updates)."""
+        self.reference = self.samples[0][0]
+        self._clear_sums()
+        for t, area in self.samples:
+            self._add_sums(t - self.reference, area, 1)
+        self.since_rebase = 0
+
+    def update(self, elapsed_time, area):
+        """Add a sample and return the windowed slope (area units per second)."""
+        if self.reference is None:
+            self.reference = elapsed_time
+        self.samples.append((elapsed_time, area))
+        self._add_sums(elapsed_time - self.reference, area, 1)
+        if len(self.samples) > self.window:
+            t, old_area = self.samples.popleft()
+            self._add_sums(t - self.reference, old_area, -1)
+        self.since_rebase += 1
+        if self.since_rebase >= self.window:
+            self._rebase()
+        return self.slope()
+
+    def slope(self):
+        n = len(self.samples)
+        if n < 2:
+            return 0.0 * self.sum_a
+        spread = n * self.sum_tt - self.sum_t * self.sum_t
+        if spread <= 0:
+            return 0.0 * self.sum_a
+        return (n * self.sum_ta - self.sum_t * self.sum_a) / spread
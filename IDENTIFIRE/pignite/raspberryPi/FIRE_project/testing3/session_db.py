@@ -0,0 +1,266 @@
+# session_db.py
+# SQLite store of every burn: session parameters, per-frame series and final summaries
+#
+# All writes go through one background thread that owns the connection and
+# commits in batches, so the analyzer's frame workers only append to a queue.
+#
+# Usage: python3 session_db.py [--moisture MEDIUM] [--min-peak-ros 5] [--frames SESSION_ID]
+
+import os
+import json
+import time
+import queue
+import sqlite3
+import threading
+import config
+import fire_log
+
+log = fire_log.get_logger("sessiondb")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    moisture TEXT,
+    camera_id TEXT,
+    duration_sec REAL,
+    temp_threshold_delta REAL,
+    params TEXT
+);
+CREATE TABLE IF NOT EXISTS frames (
+    session_id INTEGER NOT NULL,
+    frame_number INTEGER NOT NULL,
+    elapsed_sec REAL,
+    current_burn_area_cm2 REAL,
+    cumulative_burn_area_cm2 REAL,
+    burn_percentage REAL,
+    max_temp_celsius REAL,
+    mean_temp_celsius REAL,
+    ros_instantaneous_cm2_per_sec REAL,
+    ros_windowed_cm2_per_sec REAL,
+    head_ros_cm_per_sec REAL,
+    PRIMARY KEY (session_id, frame_number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sample_frames (
+    session_id INTEGER NOT NULL,
+    frame_number INTEGER NOT NULL,
+    sample INTEGER NOT NULL,
+    cumulative_burn_area_cm2 REAL,
+    burn_percentage REAL,
+    ros_windowed_cm2_per_sec REAL,
+    PRIMARY KEY (session_id, sample, frame_number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summaries (
+    session_id INTEGER PRIMARY KEY,
+    moisture TEXT,
+    duration_sec REAL,
+    final_burn_area_cm2 REAL,
+    final_burn_percentage REAL,
+    avg_ros_cm2_per_sec REAL,
+    max_ros_cm2_per_sec REAL,
+    linear_ros_cm_per_sec REAL,
+    max_head_ros_cm_per_sec REAL,
+    max_temp_celsius REAL,
+    ignition_time_sec REAL,
+    auto_stop_time_sec REAL,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    session_id INTEGER NOT NULL,
+    sample INTEGER NOT NULL,
+    area_cm2 REAL,
+    final_burn_area_cm2 REAL,
+    final_burn_percentage REAL,
+    avg_ros_cm2_per_sec REAL,
+    max_ros_cm2_per_sec REAL,
+    ignition_time_sec REAL,
+    stop_time_sec REAL,
+    PRIMARY KEY (session_id, sample)
+) WITHOUT ROWID;
+-- "all burns at moisture X with peak ROS > Y" is a range scan on this index
+-- (moisture is copied into summaries so the query needs no join)
+CREATE INDEX IF NOT EXISTS summaries_moisture_ros ON summaries (moisture, max_ros_cm2_per_sec);
+CREATE INDEX IF NOT EXISTS summaries_ros ON summaries (max_ros_cm2_per_sec);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started_at);
+"""
+
+# Analyzer config recorded with every session
+SESSION_PARAMS = (
+    "BURN_TEMP_DELTA", "MIN_BURN_TEMP_ABSOLUTE", "EDGE_DETECTION_METHOD", "MIN_CONTOUR_AREA_PIXELS",
+    "ROS_STOP_THRESHOLD", "MIN_ZERO_FRAMES", "ROS_WINDOW_FRAMES", "TEMPORAL_FILTER", "LENS_MODEL",
+    "CAMERA_DISTANCE_CM", "DEFAULT_CAPTURE_FPS",
+)
+
+_STOP = object()
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or config.SESSION_DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")      # readers never block the writer
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class SessionDB:
+    """Queue-fed writer; record_frame() is a frame listener and never touches SQLite itself."""
+
+    def __init__(self, path=None, batch_frames=None, flush_interval=None):
+        self.path = path or config.SESSION_DB_PATH
+        self.batch_frames = batch_frames or config.SESSION_DB_BATCH_FRAMES
+        self.flush_interval = flush_interval or config.SESSION_DB_FLUSH_INTERVAL
+        self.queue = queue.Queue()
+        self.session_id = None
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+        print(f"[SessionDB] Recording sessions to {self.path}")
+
+    # Producer side (any thread)
+
+    def start_session(self, duration_sec=None, temp_threshold=None, moisture=None):
+        params = {name: getattr(config, name, None) for name in SESSION_PARAMS}
+        self.queue.put(("session", (time.time(), moisture, config.CAMERA_ID, duration_sec, temp_threshold,
+                                    json.dumps(params, default=str))))
+
+    def record_frame(self, frame_result, celsius_data=None, cumulative_burn_mask=None):
+        """Frame listener: copy the scalars out and queue them."""
+        f = frame_result
+        row = (f['frame_number'], f['elapsed_sec'], f['current_burn_area_cm2'], f['cumulative_burn_area_cm2'],
+               f['burn_percentage'], float(f['max_temp_celsius']), float(f['mean_temp_celsius']),
+               f['ros_instantaneous_cm2_per_sec'], f['ros_windowed_cm2_per_sec'], f.get('head_ros_cm_per_sec'))
+        samples = [(f['frame_number'], s['sample'], s['cumulative_burn_area_cm2'], s['burn_percentage'],
+                    s['ros_windowed_cm2_per_sec']) for s in f.get('samples', ())]
+        self.queue.put(("frame", (row, samples)))
+
+    def finish_session(self, summary, sample_areas_cm2=None):
+        """Final summary (and per-sample results with each sample's area) for the current session."""
+        self.queue.put(("summary", (time.time(), summary, list(sample_areas_cm2 or []))))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self):
+        self.queue.put((_STOP, None))
+        self.thread.join(timeout=5)
+
+    # Writer thread
+
+    def _writer(self):
+        conn = connect(self.path)
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather a batch: up to batch_frames items or flush_interval seconds, whichever comes first
+            while len(batch) < self.batch_frames and batch[-1][0] == "frame":
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    running = self._write_batch(conn, batch)
+            except sqlite3.Error as e:
+                log.error("write failed", extra={"fields": {"error": e, "items": len(batch)}})
+            for kind, payload in batch:
+                if kind == "flush":
+                    payload.set()
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        frames, sample_frames = [], []
+
+        def write_frames():
+            if self.session_id is not None:
+                conn.executemany("INSERT OR REPLACE INTO frames VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                                 [(self.session_id,) + r for r in frames])
+                conn.executemany("INSERT OR REPLACE INTO sample_frames VALUES (?,?,?,?,?,?)",
+                                 [(self.session_id,) + r for r in sample_frames])
+            frames.clear()
+            sample_frames.clear()
+
+        for kind, payload in batch:
+            if kind == "frame":
+                frames.append(payload[0])
+                sample_frames.extend(payload[1])
+                continue
+            write_frames()
+            if kind == "session":
+                cursor = conn.execute("INSERT INTO sessions (started_at, moisture, camera_id, duration_sec, "
+                                      "temp_threshold_delta, params) VALUES (?,?,?,?,?,?)", payload)
+                self.session_id = cursor.lastrowid
+            elif kind == "summary":
+                self._write_summary(conn, *payload)
+            elif kind is _STOP:
+                return False
+        write_frames()
+        return True
+
+    def _write_summary(self, conn, ended_at, summary, sample_areas):
+        if self.session_id is None:
+            return
+        conn.execute("UPDATE sessions SET ended_at = ? WHERE id = ?", (ended_at, self.session_id))
+        moisture = conn.execute("SELECT moisture FROM sessions WHERE id = ?", (self.session_id,)).fetchone()[0]
+        conn.execute("INSERT OR REPLACE INTO summaries VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", (
+            self.session_id, moisture, summary['duration_sec'], summary['final_burn_area_cm2'],
+            summary['final_burn_percentage'], summary['avg_ros_cm2_per_sec'], summary['max_ros_cm2_per_sec'],
+            summary['linear_ros_cm_per_sec'], summary['max_head_ros_cm_per_sec'], float(summary['max_temp_celsius']),
+            summary['ignition_time_sec'], summary['auto_stop_time_sec'], json.dumps(summary, default=str)))
+        conn.executemany("INSERT OR REPLACE INTO samples VALUES (?,?,?,?,?,?,?,?,?)", [
+            (self.session_id, s['sample'], sample_areas[i] if i < len(sample_areas) else None,
+             s['final_burn_area_cm2'], s['final_burn_percentage'], s['avg_ros_cm2_per_sec'],
+             s['max_ros_cm2_per_sec'], s['ignition_time_sec'], s['stop_time_sec'])
+            for i, s in enumerate(summary['samples'])])
+
+
+def find_burns(conn, moisture=None, min_peak_ros=None):
+    """Summaries (newest first) filtered by moisture level and/or peak ROS (cm²/s)."""
+    query = ("SELECT s.id, s.started_at, m.moisture, m.duration_sec, m.final_burn_percentage, "
+             "m.avg_ros_cm2_per_sec, m.max_ros_cm2_per_sec, m.linear_ros_cm_per_sec "
+             "FROM summaries m JOIN sessions s ON s.id = m.session_id WHERE 1")
+    args = []
+    if moisture is not None:
+        query += " AND m.moisture = ?"
+        args.append(moisture)
+    if min_peak_ros is not None:
+        query += " AND m.max_ros_cm2_per_sec > ?"
+        args.append(min_peak_ros)
+    return conn.execute(query + " ORDER BY s.started_at DESC", args).fetchall()
+
+
+def frame_series(conn, session_id):
+    """(elapsed_sec, cumulative_burn_area_cm2, ros_windowed_cm2_per_sec) rows of one session."""
+    return conn.execute("SELECT elapsed_sec, cumulative_burn_area_cm2, ros_windowed_cm2_per_sec FROM frames "
+                        "WHERE session_id = ? ORDER BY frame_number", (session_id,)).fetchall()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the burn session database")
+    parser.add_argument("--db", default=config.SESSION_DB_PATH)
+    parser.add_argument("--moisture", default=None, help="DRY, MEDIUM, WET")
+    parser.add_argument("--min-peak-ros", type=float, default=None, help="Peak ROS above this (cm²/s)")
+    parser.add_argument("--frames", type=int, default=None, metavar="SESSION_ID", help="Dump one session's series")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No session database at {args.db}")
+    conn = connect(args.db)
+
+    if args.frames is not None:
+        for elapsed, area, ros in frame_series(conn, args.frames):
+            print(f"{elapsed:8.2f}s  {area:9.2f} cm²  {ros:7.3f} cm²/s")
+    else:
+        start = time.perf_counter()
+        rows = find_burns(conn, args.moisture, args.min_peak_ros)
+        took = (time.perf_counter() - start) * 1000
+        for sid, started, moisture, duration, pct, avg_ros, peak_ros, linear_ros in rows:
+            print(f"#{sid:<5} {time.strftime('%Y-%m-%d %H:%M', time.localtime(started))}  {moisture or '-':<7} "
+                  f"{duration:7.1f}s  {pct:5.1f}%  avg {avg_ros:6.2f}  peak {peak_ros:6.2f} cm²/s  "
+                  f"linear {linear_ros or 0:5.2f} cm/s")
+        print(f"{len(rows)} sessions ({took:.1f} ms)")
@@ -0,0 +1,68 @@
+# temporal_filter.py
+# Per-pixel temporal denoising of raw frames before burn detection
+# (all state preallocated, updated in place)
+
+import numpy as np
+import config
+
+
+class EmaFilter:
+    """Exponential moving average: state += alpha · (raw - state)."""
+
+    def __init__(self, shape, alpha=None):
+        self.alpha = alpha if alpha is not None else config.TEMPORAL_EMA_ALPHA
+        self.state = np.zeros(shape, dtype=np.float32)
+        self.delta = np.zeros(shape, dtype=np.float32)
+        self.output = np.zeros(shape, dtype=np.uint16)
+        self.primed = False
+
+    def apply(self, raw_frame):
+        """Filtered raw frame (internal buffer, valid until the next call)."""
+        if not self.primed:
+            self.state[...] = raw_frame
+            self.primed = True
+        else:
+            np.subtract(raw_frame, self.state, out=self.delta)
+            self.delta *= self.alpha
+            self.state += self.delta
+        np.copyto(self.output, self.state, casting="unsafe")
+        return self.output
+
+
+class RecursiveMedianFilter:
+    """y_t = median(x_t, x_t-1, y_t-1): drops single-frame spikes, keeps steps one frame late."""
+
+    def __init__(self, shape):
+        self.previous = np.zeros(shape, dtype=np.uint16)
+        self.output = np.zeros(shape, dtype=np.uint16)
+        self.low = np.zeros(shape, dtype=np.uint16)
+        self.high = np.zeros(shape, dtype=np.uint16)
+        self.primed = False
+
+    def apply(self, raw_frame):
+        """Filtered raw frame (internal buffer, valid until the next call)."""
+        if not self.primed:
+            self.previous[...] = raw_frame
+            self.output[...] = raw_frame
+            self.primed = True
+            return self.output
+        # median(a, b, c) = max(min(a, b), min(max(a, b), c)), integer only
+        np.minimum(raw_frame, self.previous, out=self.low)
+        np.maximum(raw_frame, self.previous, out=self.high)
+        np.minimum(self.high, self.output, out=self.high)
+        np.maximum(self.low, self.high, out=self.output)
+        self.previous[...] = raw_frame
+        return self.output
+
+
+FILTERS = {
+    "ema": EmaFilter,
+    "median3": RecursiveMedianFilter,
+}
+
+
+def make_filter(kind, shape):
+    """Filter instance for kind ("ema", "median3"), None when kind is None."""
+    if not kind:
+        return None
+    return FILTERS[kind](shape)
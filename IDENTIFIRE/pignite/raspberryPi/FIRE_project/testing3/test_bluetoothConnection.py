@@ -0,0 +1,129 @@
+# test_bluetoothConnection.py
+# HM-10 bit-banged TX against a recording fake pigpio.pi (no daemon or GPIO needed)
+#
+#   python3 -m pytest test_bluetoothConnection.py
+
+import threading
+import bluetoothConnection as bt
+
+TX_PIN = 18
+BAUD = 115200
+
+
+class FakePi:
+    """Records every wave built and the order waves are chained onto the wire."""
+
+    def __init__(self, max_pulses=120):
+        self.max_pulses = max_pulses
+        self.pending = []
+        self.waves = {}
+        self.next_id = 0
+        self.sent = []          # one list of pulses per wave_chain call
+        self.pin_levels = {}
+        self.lock = threading.Lock()
+
+    def wave_get_max_pulses(self):
+        return self.max_pulses
+
+    def set_mode(self, pin, mode):
+        pass
+
+    def write(self, pin, level):
+        self.pin_levels[pin] = level
+
+    def wave_add_generic(self, pulses):
+        self.pending.extend(pulses)
+
+    def wave_create(self):
+        with self.lock:
+            if len(self.pending) > self.max_pulses:
+                return -1
+            wid, self.next_id = self.next_id, self.next_id + 1
+            self.waves[wid] = self.pending
+            self.pending = []
+            return wid
+
+    def wave_chain(self, wave_ids):
+        self.sent.append([p for wid in wave_ids for p in self.waves[wid]])
+
+    def wave_tx_busy(self):
+        return 0
+
+    def wave_delete(self, wid):
+        del self.waves[wid]
+
+
+def decode_pulses(pulses, tx_pin=TX_PIN, baud=BAUD):
+    """8N1 bytes back from a pulse list, sampling each bit at its centre."""
+    mask = 1 << tx_pin
+    edges = []      # (start_us, level)
+    t = 0
+    for p in pulses:
+        edges.append((t, 1 if p.gpio_on & mask else 0))
+        t += p.delay
+
+    def level_at(us):
+        level = 1
+        for start, lvl in edges:
+            if start > us:
+                break
+            level = lvl
+        return level
+
+    out = bytearray()
+    bit = 0
+    total_bits = round(t * baud / 1e6)
+    while bit + 10 <= total_bits:
+        centre = lambda n: (bit + n + 0.5) * 1e6 / baud
+        assert level_at(centre(0)) == 0, "missing start bit"
+        out.append(sum(level_at(centre(1 + i)) << i for i in range(8)))
+        assert level_at(centre(9)) == 1, "missing stop bit"
+        bit += 10
+    return bytes(out)
+
+
+def test_encode_pulses_round_trip():
+    data = bytes(range(256)) + b"\x00\xff\x55\xaa"
+    pulses = bt.encode_pulses(data, TX_PIN, BAUD)
+    assert decode_pulses(pulses) == data
+
+
+def test_encode_pulses_timing_does_not_drift():
+    data = b"\x55" * 200     # alternating bits: one pulse per bit
+    pulses = bt.encode_pulses(data, TX_PIN, BAUD)
+    assert sum(p.delay for p in pulses) == round(len(data) * 10 * 1e6 / BAUD)
+
+
+def test_chunks_stay_under_pulse_limit():
+    data = b"\x55" * 500     # worst case, 10 pulses per byte
+    for max_pulses in (10, 37, 120, 1000):
+        chunks = bt.chunk_message(data, max_pulses)
+        assert b"".join(chunks) == data
+        for chunk in chunks:
+            assert len(bt.encode_pulses(chunk, TX_PIN, BAUD)) <= max_pulses
+
+
+def test_send_splits_long_message_within_pulse_budget():
+    pi = FakePi(max_pulses=120)
+    tx = bt.HM10Transmitter(pi, TX_PIN, BAUD)
+    data = b"\x55" * 100 + b"tail"
+    tx.send(data)
+
+    assert pi.pin_levels[TX_PIN] == 1
+    assert len(pi.sent) > 1
+    assert all(len(chain) <= tx.max_pulses for chain in pi.sent)
+    assert b"".join(decode_pulses(chain) for chain in pi.sent) == data
+    assert not pi.waves     # every wave deleted after sending
+
+
+def test_send_async_keeps_message_order():
+    pi = FakePi()
+    tx = bt.HM10Transmitter(pi, TX_PIN, BAUD)
+    messages = [f"msg {i}\r\n" for i in range(20)]
+    for text in messages:
+        tx.send_async(text)
+    tx.flush()
+    tx.close()
+
+    received = b"".join(decode_pulses(chain) for chain in pi.sent)
+    assert received == "".join(messages).encode()
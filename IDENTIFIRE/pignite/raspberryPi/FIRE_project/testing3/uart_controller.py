@@ -2,6 +2,10 @@ import serial
 import time
 from enum import Enum
 import config
+import fire_log
+import metrics
+
+log = fire_log.get_logger("uart")
 
 
 class SystemState(Enum):
@@ -10,6 +14,33 @@ class SystemState(Enum):
     ERROR = "error"
 
 
+def format_final_line(summary):
+    """FINAL,avg,peak,pct[,S1:avg:peak:pct,...] - the Arduino reads the first three values."""
+    line = (f"FINAL,{summary['avg_ros_cm2_per_sec']:.2f},{summary['max_ros_cm2_per_sec']:.2f},"
+            f"{summary['final_burn_percentage']:.1f}")
+    for sample in summary.get('samples', []):
+        line += (f",S{sample['sample']}:{sample['avg_ros_cm2_per_sec']:.2f}:"
+                 f"{sample['max_ros_cm2_per_sec']:.2f}:{sample['final_burn_percentage']:.1f}")
+    return line
+
+
+def flatten_payload(data):
+    """Replace the 'samples' and 'sensitivity' lists with s<N>_<key> and d<delta>_<key>
+    fields, so a summary fits the comma-separated k:v UART format."""
+    if 'samples' not in data and 'sensitivity' not in data:
+        return data
+    flat = {k: v for k, v in data.items() if k not in ('samples', 'sensitivity')}
+    for sample in data.get('samples') or []:
+        for key, value in sample.items():
+            if key != 'sample':
+                flat[f"s{sample['sample']}_{key}"] = value
+    for point in data.get('sensitivity') or []:
+        for key, value in point.items():
+            if key != 'delta_celsius':
+                flat[f"d{point['delta_celsius']:g}_{key}"] = value
+    return flat
+
+
 class UARTController:
     """UART communication with Arduino. Commands: START/STOP/STATUS/RESULTS/RESET/FIRESTATUS."""
 
@@ -48,10 +79,10 @@ class UARTController:
             if self.serial.in_waiting:
                 line = self.serial.readline().decode("utf-8", errors="replace").strip()
                 if line:
-                    print(f"[UART] Received: {line}")
+                    log.info("received", extra={"fields": {"line": line}})
                     return line
         except Exception as e:
-            print(f"[UART] Read error: {e}")
+            log.error("read error", extra={"fields": {"error": e}})
         return None
 
     def send_response(self, data):
@@ -61,6 +92,7 @@ class UARTController:
             return False
         try:
             if isinstance(data, dict):
+                data = flatten_payload(data)
                 data_str = ','.join(f"{k}:{v}" for k, v in data.items())
             else:
                 data_str = str(data)
@@ -68,12 +100,11 @@ class UARTController:
             self.serial.write((data_str + "\n").encode("utf-8"))
             self.serial.flush()
 
-            if config.DEBUG_MODE:
-                print(f"[UART] Sent: {data_str}")
+            log.debug("sent", extra={"fields": {"data": data_str}})
 
             return True
         except Exception as e:
-            print(f"[UART] Send error: {e}")
+            log.error("send error", extra={"fields": {"error": e}})
             return False
 
     def parse_command(self, cmd_str):
@@ -85,12 +116,15 @@ class UARTController:
         command = parts[0].upper()
 
         if command == "START":
+            # START[:duration_sec[:temp_threshold[:moisture]]], empty fields take the defaults
+            moisture = (parts[3].strip().upper() or None) if len(parts) > 3 else None
             try:
-                duration = int(parts[1]) if len(parts) > 1 else config.DEFAULT_CAPTURE_DURATION
-                threshold = int(parts[2]) if len(parts) > 2 else config.BURN_TEMP_DELTA
-                return "START", {"duration_sec": duration, "temp_threshold": threshold}
+                duration = int(parts[1]) if len(parts) > 1 and parts[1] else config.DEFAULT_CAPTURE_DURATION
+                threshold = int(parts[2]) if len(parts) > 2 and parts[2] else config.BURN_TEMP_DELTA
+                return "START", {"duration_sec": duration, "temp_threshold": threshold, "moisture": moisture}
             except:
-                return "START", {"duration_sec": config.DEFAULT_CAPTURE_DURATION, "temp_threshold": config.BURN_TEMP_DELTA}
+                return "START", {"duration_sec": config.DEFAULT_CAPTURE_DURATION, "temp_threshold": config.BURN_TEMP_DELTA,
+                                 "moisture": moisture}
 
         elif command in ["STOP", "STATUS", "RESULTS", "RESET", "FIRESTATUS", "PING", "FORCE"]:
             return command, {}
@@ -104,7 +138,7 @@ class UARTController:
             if self.state != SystemState.IDLE:
                 return f"error: Cannot start, system in {self.state.value} state"
             if 'start' in callbacks:
-                success = callbacks['start'](args['duration_sec'], args['temp_threshold'])
+                success = callbacks['start'](args['duration_sec'], args['temp_threshold'], args.get('moisture'))
                 if success:
                     self.state = SystemState.BUSY
                     return "1"
@@ -139,29 +173,33 @@ class UARTController:
             return "1"
 
         elif command == "FIRESTATUS":
-            fire_lit = False
-            if 'status' in callbacks:
-                status_data = callbacks['status']()
-                fire_lit = status_data.get('ros_instantaneous_cm2_per_sec', 0) > config.FIRE_LIT_FIRESTATUS
-            import main
-            main.FIRE_IS_ACTIVE = fire_lit
+            fire_lit = callbacks['fire_status']() if 'fire_status' in callbacks else False
             return "1" if fire_lit else "0"
 
         elif command == "PING":
             return "1"
 
         elif command == "FORCE":
-            import importlib
-            main = importlib.import_module('main')
-            if hasattr(main, 'system'):
-                main.system.analyzer.ignition_frame = 1
-                main.system.analyzer.ignition_time = 0.0
+            if 'force' in callbacks:
+                callbacks['force']()
             return "1"
 
         else:
             return f"error: Unknown command {command}"
 
 
+    def poll(self, callbacks):
+        """Read one pending command, dispatch it and send the response."""
+        cmd_str = self.read_command()
+        if not cmd_str:
+            return False
+        started = time.perf_counter()
+        command, args = self.parse_command(cmd_str)
+        response = self.handle_command(command, args, callbacks)
+        self.send_response(response)
+        metrics.UART_COMMAND_SECONDS.labels(command).observe(time.perf_counter() - started)
+        return True
+
     def update_state(self, new_state):
         if isinstance(new_state, str):
             new_state = SystemState(new_state)
@@ -170,6 +208,6 @@ class UARTController:
 
     def store_results(self, results):
         """Store results for RESULTS command."""
-        self.last_results = results
+        self.last_results = flatten_payload(results)
         self.state = SystemState.IDLE
 
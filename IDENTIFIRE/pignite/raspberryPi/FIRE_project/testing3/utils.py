@@ -20,6 +20,14 @@ def celsius_to_raw(celsius):
 
 def read_gray_file(file_path):
     """Read .gray file, return (raw_data, celsius_data)."""
+    raw_data = read_raw_gray(file_path)
+    celsius_data = raw_to_celsius(raw_data)
+    
+    return raw_data, celsius_data
+
+
+def read_raw_gray(file_path):
+    """Read .gray file, return raw Lepton values without conversion."""
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
@@ -30,11 +38,10 @@ def read_gray_file(file_path):
     if len(data) != config.EXPECTED_FILE_SIZE:
         raise ValueError(f"Invalid file size: {len(data)} bytes (expected {config.EXPECTED_FILE_SIZE})")
     
-    raw_data = np.frombuffer(data, dtype=config.DTYPE_RAW).copy()
+    # Native-endian copy: OpenCV and integer detectors cannot take '>u2'
+    raw_data = np.frombuffer(data, dtype=config.DTYPE_RAW).astype(np.uint16)
     raw_data = raw_data.reshape((config.IMAGE_HEIGHT, config.IMAGE_WIDTH))
-    celsius_data = raw_to_celsius(raw_data)
-    
-    return raw_data, celsius_data
+    return raw_data
 
 
 def extract_frame_number(file_path):
@@ -46,6 +53,42 @@ def extract_frame_number(file_path):
     except ValueError:
         return -1
 
+def list_frame_files(folder):
+    """Capture frames in a folder, ordered by frame number."""
+    paths = [os.path.join(folder, name) for name in os.listdir(folder)
+             if name.startswith(config.FILE_PREFIX) and name.endswith(config.FILE_EXTENSION)]
+    return sorted(paths, key=extract_frame_number)
+
+
+def load_session_frames(folder, cache_name="frames_raw.npy"):
+    """All raw frames of a recorded session as a read-only (N, H, W) uint16 memmap.
+    
+    Frames are decoded once into cache_name inside the session folder; later
+    calls (and other processes) map the cache instead of re-reading .gray files.
+    """
+    paths = list_frame_files(folder)
+    if not paths:
+        raise FileNotFoundError(f"No {config.FILE_EXTENSION} frames in {folder}")
+    
+    cache_path = os.path.join(folder, cache_name)
+    newest = max(os.path.getmtime(p) for p in paths)
+    if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < newest:
+        tmp_path = cache_path + ".tmp"
+        frames = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint16,
+                                           shape=(len(paths), config.IMAGE_HEIGHT, config.IMAGE_WIDTH))
+        for i, path in enumerate(paths):
+            frames[i] = read_raw_gray(path)
+        frames.flush()
+        del frames
+        os.replace(tmp_path, cache_path)
+    
+    frames = np.load(cache_path, mmap_mode="r")
+    if len(frames) != len(paths):
+        os.remove(cache_path)
+        return load_session_frames(folder, cache_name)
+    return frames
+
+
 def get_timestamp_from_file(file_path):
     """Get file modification timestamp."""
     return os.path.getmtime(file_path)
@@ -80,6 +123,43 @@ def normalize_to_uint8(data, min_val=None, max_val=None):
     return normalized.astype(np.uint8)
 
 
+def otsu_binning(raw_data, shift=None):
+    """(low, high, shift) of the raw Otsu histogram: bins of 2**shift raw units from the minimum.
+    
+    The shift grows if needed to keep the histogram under 2**OTSU_MAX_BIN_BITS bins.
+    """
+    shift = config.OTSU_HIST_SHIFT if shift is None else shift
+    low, high = int(raw_data.min()), int(raw_data.max())
+    return low, high, max(shift, (high - low).bit_length() - config.OTSU_MAX_BIN_BITS)
+
+
+def otsu_split(hist):
+    """Index of the last cold-class bin of hist by Otsu's between-class variance."""
+    hist = np.asarray(hist, dtype=np.float64)
+    levels = np.arange(len(hist), dtype=np.float64)
+    
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * levels)
+    total = weight[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mass[-1] * weight - mass * total) ** 2 / (weight * (total - weight))
+    between[~np.isfinite(between)] = -1
+    return int(np.argmax(between))
+
+
+def otsu_threshold_raw(raw_data, shift=None):
+    """Otsu threshold on raw Lepton values from a shifted uint16 histogram.
+    
+    Returns the raw value t such that raw > t is the hot class, without
+    converting or normalizing the frame. The histogram spans only min..max
+    (see otsu_binning).
+    """
+    low, _, shift = otsu_binning(raw_data, shift)
+    hist = np.bincount(((raw_data - low) >> shift).reshape(-1))
+    # Last bin of the cold class → highest raw value it contains
+    return low + ((otsu_split(hist) + 1) << shift) - 1
+
+
 def pixels_to_cm2(pixel_count):
     """Convert pixel count to area in cm²."""
     return pixel_count * config.PIXEL_AREA_CM2